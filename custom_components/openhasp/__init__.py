@@ -1,34 +1,56 @@
 """HASP components module."""
-import hashlib
+from collections import OrderedDict
+from datetime import timedelta
+from functools import partial
 import json
 import logging
 import os
-import pathlib
 import re
+import time
 import jsonschema
 
 from homeassistant.components.button import DOMAIN as BUTTON_DOMAIN
 from homeassistant.components.number import DOMAIN as NUMBER_DOMAIN
 from homeassistant.components.binary_sensor import DOMAIN as BINARY_SENSOR_DOMAIN
 from homeassistant.components.light import DOMAIN as LIGHT_DOMAIN
+from homeassistant.components.media_player.const import (
+    ATTR_MEDIA_DURATION,
+    ATTR_MEDIA_POSITION,
+    ATTR_MEDIA_POSITION_UPDATED_AT,
+)
 from homeassistant.components.switch import DOMAIN as SWITCH_DOMAIN
-from homeassistant.const import CONF_NAME, STATE_UNAVAILABLE, STATE_UNKNOWN
+from homeassistant.const import (
+    ATTR_ENTITY_PICTURE,
+    CONF_ENTITY_ID,
+    CONF_NAME,
+    STATE_PLAYING,
+    STATE_UNAVAILABLE,
+    STATE_UNKNOWN,
+)
 from homeassistant.core import callback
 from homeassistant.exceptions import TemplateError
 from homeassistant.helpers import device_registry as dr, entity_registry
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.entity_component import EntityComponent
-from homeassistant.helpers.event import TrackTemplate, async_track_template_result
+from homeassistant.helpers.event import (
+    TrackTemplate,
+    async_call_later,
+    async_track_state_change_event,
+    async_track_template_result,
+    async_track_time_interval,
+)
 from homeassistant.helpers.network import get_url
 from homeassistant.helpers.reload import async_integration_yaml_config
 from homeassistant.helpers.restore_state import RestoreEntity
 from homeassistant.helpers.service import async_call_from_config
-from homeassistant.util import slugify
+from homeassistant.helpers.template import Template
+from homeassistant.util import dt as dt_util, slugify
 import voluptuous as vol
 
 from .common import HASP_IDLE_SCHEMA
 from .const import (
     ATTR_CONFIG_SUBMODULE,
+    ATTR_DITHER,
     ATTR_FORCE_FITSCREEN,
     ATTR_HEIGHT,
     ATTR_IDLE,
@@ -40,17 +62,28 @@ from .const import (
     ATTR_COMMAND_PARAMETERS,
     ATTR_CONFIG_PARAMETERS,
     ATTR_WIDTH,
+    CONF_BAR_WIDTH,
     CONF_COMPONENT,
     CONF_EVENT,
+    CONF_CACHE_PATH,
     CONF_HWID,
+    CONF_IMAGE,
+    CONF_IMAGE_CACHE,
+    CONF_INTERPOLATE,
+    CONF_MAX_SIZE,
+    CONF_MIN_INTERVAL,
     CONF_OBJECTS,
+    CONF_ONLY_ON_CHANGE,
+    CONF_ONLY_VISIBLE,
     CONF_OBJID,
     CONF_PAGES,
     CONF_PAGES_PATH,
     CONF_PLATE,
     CONF_PROPERTIES,
+    CONF_PROPERTY_OPTIONS,
     CONF_TOPIC,
     CONF_TRACK,
+    DATA_IMAGE_FETCHER,
     DATA_IMAGES,
     DATA_LISTENER,
     DISCOVERED_MANUFACTURER,
@@ -65,12 +98,15 @@ from .const import (
     HASP_EVENT_RELEASE,
     HASP_EVENT_UP,
     HASP_EVENTS,
+    HASP_IDLE_LONG,
+    HASP_IDLE_OFF,
     HASP_LWT,
     HASP_NUM_PAGES,
     HASP_ONLINE,
     HASP_VAL,
     MAJOR,
     MINOR,
+    MQTT_PAYLOAD_LIMIT,
     SERVICE_CLEAR_PAGE,
     SERVICE_LOAD_PAGE,
     SERVICE_PAGE_CHANGE,
@@ -81,7 +117,15 @@ from .const import (
     SERVICE_COMMAND,
     SERVICE_CONFIG,
 )
-from .image import ImageServeView, image_to_rgb565
+from .image import (
+    ImageCache,
+    ImageFetcher,
+    ImageServeView,
+    async_prepare_image,
+    avatar_url,
+    image_url,
+)
+from .pages import load_pages
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -106,12 +150,45 @@ EVENT_SCHEMA = cv.schema_with_slug_keys([cv.SERVICE_SCHEMA])
 
 PROPERTY_SCHEMA = cv.schema_with_slug_keys(cv.template)
 
+# media player cover for img object
+IMAGE_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_ENTITY_ID): cv.entity_id,
+        vol.Optional(ATTR_WIDTH): cv.positive_int,
+        vol.Optional(ATTR_HEIGHT): cv.positive_int,
+        vol.Optional(ATTR_FORCE_FITSCREEN, default=False): cv.boolean,
+        vol.Optional(ATTR_DITHER, default=False): cv.boolean,
+    }
+)
+
+# publishing policy of object property
+PROPERTY_OPTIONS_SCHEMA = vol.Schema(
+    {
+        vol.Optional(CONF_MIN_INTERVAL, default=0): cv.positive_float,
+        vol.Optional(CONF_ONLY_ON_CHANGE, default=True): cv.boolean,
+        # when off, templates keep publishing while page is hidden
+        vol.Optional(CONF_ONLY_VISIBLE, default=True): cv.boolean,
+        # media player which position is interpolated locally
+        vol.Optional(CONF_INTERPOLATE): cv.entity_id,
+        # steps of interpolated bar, usually its width in pixels
+        vol.Optional(CONF_BAR_WIDTH, default=100): vol.All(
+            vol.Coerce(int), vol.Range(min=1)
+        ),
+    }
+)
+
+DEFAULT_PROPERTY_OPTIONS = PROPERTY_OPTIONS_SCHEMA({})
+
 OBJECT_SCHEMA = vol.Schema(
     {
         vol.Required(CONF_OBJID): hasp_object,
         vol.Optional(CONF_TRACK, default=None): vol.Any(cv.entity_id, None),
         vol.Optional(CONF_PROPERTIES, default={}): PROPERTY_SCHEMA,
         vol.Optional(CONF_EVENT, default={}): EVENT_SCHEMA,
+        vol.Optional(CONF_IMAGE): IMAGE_SCHEMA,
+        vol.Optional(CONF_PROPERTY_OPTIONS, default={}): cv.schema_with_slug_keys(
+            PROPERTY_OPTIONS_SCHEMA
+        ),
     }
 )
 
@@ -121,8 +198,24 @@ PLATE_SCHEMA = vol.Schema(
     },
 )
 
+IMAGE_CACHE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(CONF_CACHE_PATH): cv.string,
+        # MB
+        vol.Optional(CONF_MAX_SIZE, default=20): cv.positive_int,
+    }
+)
+
 CONFIG_SCHEMA = vol.Schema(
-    {DOMAIN: vol.Schema({cv.slug: PLATE_SCHEMA})}, extra=vol.ALLOW_EXTRA
+    {
+        DOMAIN: vol.Schema(
+            {
+                vol.Optional(CONF_IMAGE_CACHE, default={}): IMAGE_CACHE_SCHEMA,
+                cv.slug: PLATE_SCHEMA,
+            }
+        )
+    },
+    extra=vol.ALLOW_EXTRA,
 )
 
 # JSON Messages from HASP schemas
@@ -155,6 +248,7 @@ PUSH_IMAGE_SCHEMA = vol.Schema(
         vol.Optional(ATTR_WIDTH): cv.positive_int,
         vol.Optional(ATTR_HEIGHT): cv.positive_int,
         vol.Optional(ATTR_FORCE_FITSCREEN): cv.boolean,
+        vol.Optional(ATTR_DITHER): cv.boolean,
     },
     extra=vol.ALLOW_EXTRA,
 )
@@ -215,7 +309,16 @@ async def async_setup(hass, config):
         SERVICE_PUSH_IMAGE, PUSH_IMAGE_SCHEMA, "async_push_image"
     )
 
-    hass.data[DOMAIN][DATA_IMAGES] = dict()
+    cache_conf = conf[CONF_IMAGE_CACHE]
+    cache_path = cache_conf.get(CONF_CACHE_PATH)
+    image_cache = ImageCache(
+        cache_conf[CONF_MAX_SIZE] * 1024 * 1024,
+        hass.config.path(cache_path) if cache_path else None,
+    )
+    await hass.async_add_executor_job(image_cache.load)
+
+    hass.data[DOMAIN][DATA_IMAGES] = image_cache
+    hass.data[DOMAIN][DATA_IMAGE_FETCHER] = ImageFetcher(hass)
     hass.http.register_view(ImageServeView)
 
     return True
@@ -331,21 +434,30 @@ class SwitchPlate(RestoreEntity):
         )
 
         self._objects = []
+        # page => templates tracker, None for always visible templates
+        self._templates = {}
+        self._template_stats = {"renders": 0, "render_time": 0.0}
         for obj in config[CONF_OBJECTS]:
-            new_obj = HASPObject(hass, self._topic, obj)
+            new_obj = HASPObject(hass, self._topic, obj, self)
 
             self._objects.append(new_obj)
+            for _property, template in new_obj.properties.items():
+                options = new_obj.property_options(_property)
+                if CONF_INTERPOLATE in options:
+                    continue
+                page = new_obj.page if options[CONF_ONLY_VISIBLE] else None
+                if page not in self._templates:
+                    self._templates[page] = HASPTemplates(
+                        hass, self, self._template_stats
+                    )
+                self._templates[page].add(new_obj, _property, template)
         self._statusupdate = {HASP_NUM_PAGES: entry.data[CONF_PAGES]}
         self._available = False
         self._page = 1
+        self._idle = HASP_IDLE_OFF
 
         self._subscriptions = []
 
-        with open(
-            pathlib.Path(__file__).parent.joinpath("pages_schema.json"), "r"
-        ) as schema_file:
-            self.json_schema = json.load(schema_file)
-
         self._attr_unique_id = entry.data[CONF_HWID]
         self._attr_name = entry.data[CONF_NAME]
         self._attr_icon = "mdi:gesture-tap-box"
@@ -360,12 +472,50 @@ class SwitchPlate(RestoreEntity):
         """Return if entity is available."""
         return self._available
 
+    def page_visible(self, page):
+        """Return if objects of page are shown on the plate."""
+        return self._idle != HASP_IDLE_LONG and page in (0, self._page)
+
+    async def async_set_page(self, page):
+        """Set current page and send values held while it was hidden."""
+        if page == self._page:
+            return
+
+        self._page = page
+        await self.async_update_visible()
+
+    async def async_update_visible(self):
+        """Suspend templates of hidden pages, resume and flush shown ones."""
+        for page, templates in self._templates.items():
+            if self._available and (page is None or self.page_visible(page)):
+                # values changed while suspended are sent on start
+                templates.start()
+            else:
+                templates.stop()
+
+        if not self._available:
+            return
+
+        for obj in self._objects:
+            obj.update_interpolation()
+
+        await self.async_send_commands(
+            [
+                cmd
+                for obj in self._objects
+                if self.page_visible(obj.page)
+                for cmd in obj.flush_commands()
+            ]
+        )
+
     async def async_will_remove_from_hass(self):
         """Run before entity is removed."""
         _LOGGER.debug("Remove plate %s", self._entry.data[CONF_NAME])
 
         for obj in self._objects:
             await obj.disable_object()
+        for templates in self._templates.values():
+            templates.stop()
 
         for subscription in self._subscriptions:
             subscription()
@@ -382,7 +532,7 @@ class SwitchPlate(RestoreEntity):
         async def page_update_received(msg):
             """Process page state."""
             try:
-                self._page = HASP_PAGE_SCHEMA(msg.payload)
+                await self.async_set_page(HASP_PAGE_SCHEMA(msg.payload))
                 _LOGGER.debug("Page changed to %s", self._page)
                 self.async_write_ha_state()
             except vol.error.Invalid as err:
@@ -420,7 +570,7 @@ class SwitchPlate(RestoreEntity):
                 self._available = True
                 self._statusupdate = message
 
-                self._page = message[ATTR_PAGE]
+                await self.async_set_page(message[ATTR_PAGE])
                 self.async_write_ha_state()
 
                 # Update Plate device information
@@ -453,6 +603,12 @@ class SwitchPlate(RestoreEntity):
             try:
                 self._statusupdate[ATTR_IDLE] = HASP_IDLE_SCHEMA(msg.payload)
                 self.async_write_ha_state()
+
+                was_off = self._idle == HASP_IDLE_LONG
+                self._idle = self._statusupdate[ATTR_IDLE]
+                if was_off != (self._idle == HASP_IDLE_LONG):
+                    _LOGGER.debug("Plate idle %s", self._idle)
+                    await self.async_update_visible()
             except vol.error.Invalid as err:
                 _LOGGER.error("While processing idle message: %s", err)
 
@@ -482,6 +638,7 @@ class SwitchPlate(RestoreEntity):
 
                     for obj in self._objects:
                         await obj.enable_object()
+                    await self.async_update_visible()
                 else:
                     self._available = False
                     self.hass.bus.async_fire(
@@ -490,6 +647,7 @@ class SwitchPlate(RestoreEntity):
                     )
                     for obj in self._objects:
                         await obj.disable_object()
+                    await self.async_update_visible()
 
                 self.async_write_ha_state()
 
@@ -510,6 +668,11 @@ class SwitchPlate(RestoreEntity):
         if self._statusupdate:
             attributes = {**attributes, **self._statusupdate}
 
+        attributes["template_renders"] = self._template_stats["renders"]
+        attributes["template_render_time"] = round(
+            self._template_stats["render_time"], 3
+        )
+
         if ATTR_PAGE in attributes:
             del attributes[
                 ATTR_PAGE
@@ -573,7 +736,7 @@ class SwitchPlate(RestoreEntity):
                 )
                 return
 
-        self._page = page
+        await self.async_set_page(page)
 
         _LOGGER.debug("Change page %s", self._page)
         await self.hass.components.mqtt.async_publish(
@@ -601,22 +764,20 @@ class SwitchPlate(RestoreEntity):
             retain=False,
         )
 
-    async def async_push_image(self, image, obj, width=None, height=None, fitscreen=False):
+    async def async_push_image(
+        self, image, obj, width=None, height=None, fitscreen=False, dither=False
+    ):
         """Update object image."""
 
-        image_id = hashlib.md5(image.encode("utf-8")).hexdigest()
-
-        rgb_image = await self.hass.async_add_executor_job(
-            image_to_rgb565, image, (width, height), fitscreen
+        image_id = await async_prepare_image(
+            self.hass, image, (width, height), fitscreen, dither
         )
-
-        self.hass.data[DOMAIN][DATA_IMAGES][image_id] = rgb_image
+        if image_id is None:
+            return
 
         cmd_topic = f"{self._topic}/command/{obj}.src"
 
-        rgb_image_url = (
-            f"{get_url(self.hass, allow_external=False)}/api/openhasp/serve/{image_id}"
-        )
+        rgb_image_url = image_url(self.hass, image_id)
 
         _LOGGER.debug("Push %s with %s", cmd_topic, rgb_image_url)
 
@@ -628,11 +789,38 @@ class SwitchPlate(RestoreEntity):
         """Refresh objects in the SwitchPlate."""
 
         _LOGGER.info("Refreshing %s", self._entry.data[CONF_NAME])
-        for obj in self._objects:
-            await obj.refresh()
+        await self.async_send_commands(
+            [cmd for obj in self._objects for cmd in obj.refresh_commands()]
+        )
 
         await self.async_change_page(self._page)
 
+    async def async_send_commands(self, commands):
+        """Send commands packed in JSON arrays that fit plate MQTT buffer."""
+        batch = []
+        size = 2  # []
+        for cmd in commands:
+            cmd_size = len(json.dumps(cmd, ensure_ascii=False).encode()) + 1
+            if batch and size + cmd_size > MQTT_PAYLOAD_LIMIT:
+                await self._async_publish_batch(batch)
+                batch = []
+                size = 2
+            batch.append(cmd)
+            size += cmd_size
+
+        if batch:
+            await self._async_publish_batch(batch)
+
+    async def _async_publish_batch(self, batch):
+        _LOGGER.debug("Send %d commands to %s", len(batch), self._topic)
+        await self.hass.components.mqtt.async_publish(
+            self.hass,
+            f"{self._topic}/command/json",
+            json.dumps(batch, ensure_ascii=False),
+            qos=0,
+            retain=False,
+        )
+
     async def async_load_page(self, path):
         """Load pages file on the SwitchPlate, existing pages will not be cleared."""
         cmd_topic = f"{self._topic}/command"
@@ -642,40 +830,14 @@ class SwitchPlate(RestoreEntity):
             _LOGGER.error("'%s' is not an allowed directory", path)
             return
 
-        async def send_lines(lines):
-            mqtt_payload_buffer = ""
-            for line in lines:
-                if len(mqtt_payload_buffer) + len(line) > 1000:
-                    await self.hass.components.mqtt.async_publish(
-                        self.hass,
-                        f"{cmd_topic}/jsonl",
-                        mqtt_payload_buffer,
-                        qos=0,
-                        retain=False,
-                    )
-                    mqtt_payload_buffer = line
-                else:
-                    mqtt_payload_buffer = mqtt_payload_buffer + line
-            await self.hass.components.mqtt.async_publish(
-                self.hass,
-                f"{cmd_topic}/jsonl",
-                mqtt_payload_buffer,
-                qos=0,
-                retain=False,
-            )
-
         try:
-            with open(path, "r") as pages_file:
-                if path.endswith(".json"):
-                    json_data = json.load(pages_file)
-                    jsonschema.validate(instance=json_data, schema=self.json_schema)
-                    lines = []
-                    for item in json_data:
-                        if isinstance(item, dict):
-                            lines.append(json.dumps(item) + "\n")
-                    await send_lines(lines)
-                else:
-                    await send_lines(pages_file)
+            payloads = await self.hass.async_add_executor_job(
+                load_pages, path, MQTT_PAYLOAD_LIMIT
+            )
+            for payload in payloads:
+                await self.hass.components.mqtt.async_publish(
+                    self.hass, f"{cmd_topic}/jsonl", payload, qos=0, retain=False
+                )
             await self.refresh()
 
         except (IndexError, FileNotFoundError, IsADirectoryError, UnboundLocalError):
@@ -684,9 +846,9 @@ class SwitchPlate(RestoreEntity):
                 os.path.basename(path),
             )
 
-        except json.JSONDecodeError:
+        except (json.JSONDecodeError, UnicodeDecodeError):
             _LOGGER.error(
-                "Error decoding .json file: %s",
+                "Error decoding pages file: %s",
                 os.path.basename(path),
             )
 
@@ -698,36 +860,156 @@ class SwitchPlate(RestoreEntity):
             )
 
 
+class TimedTemplate(Template):
+    """Template that counts its renders and render time."""
+
+    def __init__(self, template, hass, stats):
+        """Initialize a template."""
+        super().__init__(template, hass)
+        self.stats = stats
+
+    def async_render_to_info(self, *args, **kwargs):
+        """Render template and update stats."""
+        start = time.perf_counter()
+        try:
+            return super().async_render_to_info(*args, **kwargs)
+        finally:
+            self.stats["renders"] += 1
+            self.stats["render_time"] += time.perf_counter() - start
+
+
+class HASPTemplates:
+    """Tracker for templates of objects properties on one plate page.
+
+    Same template used by several properties is rendered once per change of
+    entities it references. Only changed properties are sent to the plate.
+    Plate stops trackers of hidden pages, so they are not rendered at all.
+    """
+
+    def __init__(self, hass, plate, stats):
+        """Initialize templates tracker."""
+        self.hass = hass
+        self.plate = plate
+        self.stats = stats
+        # template string => template
+        self.templates = {}
+        # template string => [(object, property)]
+        self.targets = {}
+        self.tracker = None
+
+    def add(self, obj, _property, template):
+        """Add object property template."""
+        key = template.template
+        if key not in self.templates:
+            self.templates[key] = TimedTemplate(key, self.hass, self.stats)
+            self.targets[key] = []
+        self.targets[key].append((obj, _property))
+
+    def start(self):
+        """Start tracking, current results will be sent to the plate."""
+        if self.tracker or not self.templates:
+            return
+
+        self.tracker = async_track_template_result(
+            self.hass,
+            [TrackTemplate(template, None) for template in self.templates.values()],
+            self._async_templates_changed,
+        )
+        self.tracker.async_refresh()
+
+    def stop(self):
+        """Stop tracking."""
+        if self.tracker:
+            self.tracker.async_remove()
+            self.tracker = None
+
+    @callback
+    async def _async_templates_changed(self, event, updates):
+        commands = []
+
+        for track_template_result in updates:
+            template = track_template_result.template
+            result = track_template_result.result
+
+            if isinstance(result, TemplateError) or result is None:
+                entity = event and event.data.get("entity_id")
+                _LOGGER.error(
+                    "TemplateError('%s') "
+                    "while processing template '%s' "
+                    "in entity '%s'",
+                    result,
+                    template,
+                    entity,
+                )
+                continue
+
+            for obj, _property in self.targets[template.template]:
+                if cmd := obj.property_changed(_property, result):
+                    commands.append(cmd)
+
+        await self.plate.async_send_commands(commands)
+
+
 # pylint: disable=R0902
 class HASPObject:
     """Representation of an HASP-LVGL object."""
 
-    def __init__(self, hass, plate_topic, config):
+    def __init__(self, hass, plate_topic, config, plate):
         """Initialize an object."""
 
         self.hass = hass
+        self.plate = plate
         self.obj_id = config[CONF_OBJID]
+        self.page = int(re.match("p([0-9]+)b", self.obj_id).group(1))
         self.command_topic = f"{plate_topic}/command/{self.obj_id}."
         self.state_topic = f"{plate_topic}/state/{self.obj_id}"
         self.cached_properties = {}
 
         self.properties = config.get(CONF_PROPERTIES)
         self.event_services = config.get(CONF_EVENT)
-        self._tracked_property_templates = []
+        self.image = config.get(CONF_IMAGE)
+        self.options = config.get(CONF_PROPERTY_OPTIONS, {})
+        # properties not sent because of page visibility or min_interval
+        self._pending = set()
+        self._sent_at = {}
+        self._timers = {}
+        self._interpolate_timers = {}
+        self._image_url = None
+        # last covers, so skipping tracks back and forth needs no download
+        self._image_ids = OrderedDict()
         self._freeze_properties = []
         self._subscriptions = []
 
     async def enable_object(self):
-        """Initialize object events and properties subscriptions."""
+        """Initialize object events and image subscriptions."""
 
         if self.event_services:
             _LOGGER.debug("Setup event_services for '%s'", self.obj_id)
             self._subscriptions.append(await self.async_listen_hasp_events())
 
-        for _property, template in self.properties.items():
-            self._tracked_property_templates.append(
-                await self.async_set_property(_property, template)
+        if self.image:
+            _LOGGER.debug("Setup image for '%s'", self.obj_id)
+            self._subscriptions.append(
+                async_track_state_change_event(
+                    self.hass, [self.image[CONF_ENTITY_ID]], self._async_image_changed
+                )
+            )
+            state = self.hass.states.get(self.image[CONF_ENTITY_ID])
+            if state:
+                await self.async_update_image(state.attributes.get(ATTR_ENTITY_PICTURE))
+
+        for _property, options in self.options.items():
+            if CONF_INTERPOLATE not in options:
+                continue
+            _LOGGER.debug("Setup position interpolation for '%s'", self.obj_id)
+            self._subscriptions.append(
+                async_track_state_change_event(
+                    self.hass,
+                    [options[CONF_INTERPOLATE]],
+                    partial(self._async_player_changed, _property),
+                )
             )
+            self._interpolate(_property)
 
     async def disable_object(self):
         """Remove subscriptions and event tracking."""
@@ -736,64 +1018,209 @@ class HASPObject:
             subscription()
         self._subscriptions = []
 
-        for tracked_template in self._tracked_property_templates:
-            tracked_template.async_remove()
-        self._tracked_property_templates = []
-
-    async def async_set_property(self, _property, template):
-        """Set HASP Object property to template value."""
+        for timer in self._timers.values():
+            timer()
+        for timer, _ in self._interpolate_timers.values():
+            timer()
+        self._timers = {}
+        self._interpolate_timers = {}
+
+    def property_options(self, _property):
+        """Return publishing options of property."""
+        return self.options.get(_property, DEFAULT_PROPERTY_OPTIONS)
+
+    def property_changed(self, _property, result):
+        """Cache property result, returns command if it should be sent."""
+        options = self.property_options(_property)
+        if (
+            options[CONF_ONLY_ON_CHANGE]
+            and self.cached_properties.get(_property) == result
+        ):
+            return None
+
+        self.cached_properties[_property] = result
+        if _property in self._freeze_properties:
+            # Skip update to plate to avoid feedback loops
+            return None
+
+        if options[CONF_ONLY_VISIBLE] and not self.plate.page_visible(self.page):
+            self._pending.add(_property)
+            return None
+
+        delay = self._sent_at.get(_property, 0) + options[CONF_MIN_INTERVAL]
+        delay -= time.monotonic()
+        if delay > 0:
+            self._pending.add(_property)
+            if _property not in self._timers:
+                self._timers[_property] = async_call_later(
+                    self.hass, delay, partial(self._async_send_later, _property)
+                )
+            return None
 
-        @callback
-        async def _async_template_result_changed(event, updates):
-            track_template_result = updates.pop()
-            template = track_template_result.template
-            result = track_template_result.result
+        _LOGGER.debug(
+            "%s.%s - changed, updating with: %s", self.obj_id, _property, result
+        )
 
-            if isinstance(result, TemplateError) or result is None:
-                entity = event and event.data.get("entity_id")
-                _LOGGER.error(
-                    "TemplateError('%s') "
-                    "while processing template '%s' "
-                    "in entity '%s'",
-                    result,
-                    template,
-                    entity,
-                )
-                return
+        return self._command(_property)
 
-            self.cached_properties[_property] = result
-            if _property in self._freeze_properties:
-                # Skip update to plate to avoid feedback loops
-                return
+    def _command(self, _property):
+        self._pending.discard(_property)
+        self._sent_at[_property] = time.monotonic()
+        return f"{self.obj_id}.{_property}={self.cached_properties[_property]}"
 
-            _LOGGER.debug(
-                "%s.%s - %s changed, updating with: %s",
-                self.obj_id,
-                _property,
-                template,
-                result,
-            )
+    @callback
+    def _async_send_later(self, _property, _now):
+        """Send latest value of throttled property."""
+        self._timers.pop(_property, None)
+        if _property not in self._pending:
+            return
+        options = self.property_options(_property)
+        if options[CONF_ONLY_VISIBLE] and not self.plate.page_visible(self.page):
+            return
+        self.hass.async_create_task(
+            self.plate.async_send_commands([self._command(_property)])
+        )
 
-            await self.hass.components.mqtt.async_publish(
-                self.hass, self.command_topic + _property, result
+    def flush_commands(self):
+        """Commands for values held back while object was hidden."""
+        # position changed while hidden, so it is calculated again
+        commands = [
+            cmd
+            for _property, options in self.options.items()
+            if CONF_INTERPOLATE in options
+            and (cmd := self._interpolated_command(_property))
+        ]
+        return commands + [
+            self._command(_property)
+            for _property in list(self._pending)
+            if _property not in self._timers
+        ]
+
+    @callback
+    def _async_player_changed(self, _property, event):
+        """Handle change of interpolated media player."""
+        self._interpolate(_property)
+
+    @callback
+    def _interpolate(self, _property, _now=None):
+        """Update property with media player position extrapolated to now."""
+        self._update_timer(_property)
+        if cmd := self._interpolated_command(_property):
+            self.hass.async_create_task(self.plate.async_send_commands([cmd]))
+
+    def update_interpolation(self):
+        """Start or stop interpolation ticks after page or idle change."""
+        for _property, options in self.options.items():
+            if CONF_INTERPOLATE in options:
+                self._update_timer(_property)
+
+    def _update_timer(self, _property):
+        options = self.property_options(_property)
+        state = self.hass.states.get(options[CONF_INTERPOLATE])
+        duration = state and state.attributes.get(ATTR_MEDIA_DURATION)
+        # no ticks while page is hidden or screen is off
+        active = (
+            state is not None
+            and state.state == STATE_PLAYING
+            and (
+                not options[CONF_ONLY_VISIBLE] or self.plate.page_visible(self.page)
             )
+        )
 
-        property_template = async_track_template_result(
-            self.hass,
-            [TrackTemplate(template, None)],
-            _async_template_result_changed,
+        # tick when bar moves by one step, but not more often than min_interval
+        interval = max(
+            options[CONF_MIN_INTERVAL],
+            (duration or 0) / options[CONF_BAR_WIDTH],
+            1,
         )
-        property_template.async_refresh()
+        timer = self._interpolate_timers.get(_property)
+        if timer and (not active or timer[1] != interval):
+            self._interpolate_timers.pop(_property)[0]()
+            timer = None
+        if active and not timer:
+            self._interpolate_timers[_property] = (
+                async_track_time_interval(
+                    self.hass,
+                    partial(self._interpolate, _property),
+                    timedelta(seconds=interval),
+                ),
+                interval,
+            )
 
-        return property_template
+    def _interpolated_command(self, _property):
+        options = self.property_options(_property)
+        state = self.hass.states.get(options[CONF_INTERPOLATE])
+        position = state and state.attributes.get(ATTR_MEDIA_POSITION)
+        duration = state and state.attributes.get(ATTR_MEDIA_DURATION)
+        playing = state is not None and state.state == STATE_PLAYING
+
+        if position is None:
+            return None
+
+        updated_at = state.attributes.get(ATTR_MEDIA_POSITION_UPDATED_AT)
+        if playing and updated_at:
+            position += (dt_util.utcnow() - updated_at).total_seconds()
+        if duration:
+            position = min(position, duration)
+
+        return self.property_changed(_property, int(position))
+
+    @callback
+    def _async_image_changed(self, event):
+        """Handle media player state change."""
+        new_state = event.data.get("new_state")
+        url = new_state and new_state.attributes.get(ATTR_ENTITY_PICTURE)
+        if url != self._image_url:
+            # set before the task, so same url won't start second download
+            self._image_url = url
+            self.hass.async_create_task(self.async_update_image(url))
+
+    async def async_update_image(self, url):
+        """Pre-render media player cover and update object src if it changed."""
+        self._image_url = url
+        if not url:
+            return
 
-    async def refresh(self):
-        """Refresh based on cached values."""
-        for _property, result in self.cached_properties.items():
-            _LOGGER.debug("Refresh object %s.%s = %s", self.obj_id, _property, result)
-            await self.hass.components.mqtt.async_publish(
-                self.hass, self.command_topic + _property, result
+        cache = self.hass.data[DOMAIN][DATA_IMAGES]
+        image_id = self._image_ids.get(url)
+        if image_id is None or image_id not in cache.sizes:
+            if url.startswith("http"):
+                source = url
+            else:
+                # local media player proxy
+                source = get_url(self.hass, allow_external=False) + url
+
+            size = (self.image.get(ATTR_WIDTH), self.image.get(ATTR_HEIGHT))
+            image_id = await async_prepare_image(
+                self.hass,
+                avatar_url(source, size),
+                size,
+                self.image[ATTR_FORCE_FITSCREEN],
+                self.image[ATTR_DITHER],
             )
+            if image_id is None:
+                return
+
+            self._image_ids[url] = image_id
+            if len(self._image_ids) > 16:
+                self._image_ids.popitem(last=False)
+
+        # cover changed while rendering
+        if url != self._image_url:
+            return
+
+        # held while page is hidden or screen is off, like other properties
+        src = image_url(self.hass, image_id)
+        if cmd := self.property_changed("src", src):
+            await self.plate.async_send_commands([cmd])
+
+    def refresh_commands(self):
+        """Commands to refresh object based on cached values."""
+        self._pending.clear()
+        return [
+            f"{self.obj_id}.{_property}={result}"
+            for _property, result in self.cached_properties.items()
+        ]
 
     async def async_listen_hasp_events(self):
         """Listen to messages on MQTT for HASP events."""
@@ -28,9 +28,20 @@ CONF_GPIO = "gpio"
 CONF_NODE = "node"
 CONF_HWID = "hwid"
 CONF_INPUT = "input"
+CONF_IMAGE = "image"
+CONF_IMAGE_CACHE = "image_cache"
+CONF_CACHE_PATH = "path"
+CONF_MAX_SIZE = "max_size"
+CONF_PROPERTY_OPTIONS = "property_options"
+CONF_MIN_INTERVAL = "min_interval"
+CONF_ONLY_ON_CHANGE = "only_on_change"
+CONF_ONLY_VISIBLE = "only_visible"
+CONF_INTERPOLATE = "interpolate"
+CONF_BAR_WIDTH = "bar_width"
 
 DATA_LISTENER = "listener"
 DATA_IMAGES = "images"
+DATA_IMAGE_FETCHER = "image_fetcher"
 
 DEFAULT_TOPIC = "hasp"
 DEFAULT_PATH = "pages.jsonl"
@@ -49,6 +60,10 @@ DISCOVERED_VERSION = "sw"
 DISCOVERED_INPUT = "input"
 DISCOVERED_URL = "uri"
 
+# bytes of payload in one MQTT message for the plate. Firmware buffer also
+# holds topic and packet header, 1000 is the size upstream loader always used
+MQTT_PAYLOAD_LIMIT = 1000
+
 HASP_NUM_PAGES = "numPages"
 HASP_VAL = "val"
 HASP_EVENT = "event"
@@ -95,6 +110,7 @@ ATTR_IMAGE = "image"
 ATTR_OBJECT = "obj"
 ATTR_WIDTH = "width"
 ATTR_HEIGHT = "height"
+ATTR_DITHER = "dither"
 
 SERVICE_WAKEUP = "wakeup"
 SERVICE_CLEAR_PAGE = "clear_page"
@@ -1,31 +1,160 @@
 """Image processing and serving functions."""
 
+import asyncio
+from collections import OrderedDict
+import hashlib
+import io
 import logging
+import os
+import pathlib
+import re
 import struct
-import tempfile
+import threading
 
-from PIL import Image
-from aiohttp import hdrs, web
+from PIL import Image, ImageChops
+from aiohttp import ClientTimeout, hdrs, web
 from homeassistant.components.http.static import CACHE_HEADERS
 from homeassistant.components.http.view import HomeAssistantView
-import requests
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.network import get_url
 
-from .const import DATA_IMAGES, DOMAIN
+from .const import DATA_IMAGE_FETCHER, DATA_IMAGES, DOMAIN
 
 _LOGGER = logging.getLogger(__name__)
 
+# cover sizes supported by Yandex avatars service
+YANDEX_AVATAR_SIZES = (50, 100, 200, 400, 1000)
+RE_YANDEX_AVATAR = re.compile(r"^(https://avatars\.yandex\.net/.+/)\d+x\d+$")
 
-def image_to_rgb565(in_image, size, fitscreen):
-    """Transform image to rgb565 format according to LVGL requirements."""
+
+# 4x4 ordered dithering matrix
+BAYER4 = (
+    (0, 8, 2, 10),
+    (12, 4, 14, 6),
+    (3, 11, 1, 9),
+    (15, 7, 13, 5),
+)
+
+
+def bayer_pattern(size, step):
+    """Tiled Bayer threshold image with values from 0 to step."""
+    width, height = size
+    rows = [
+        bytes(BAYER4[y][x % 4] * step // 16 for x in range(width)) for y in range(4)
+    ]
+    return Image.frombytes("L", size, b"".join(rows[y % 4] for y in range(height)))
+
+
+def rgb565_bytes(img, dither=False):
+    """Pack RGB image to little-endian RGB565 with PIL band operations."""
+    r, g, b = img.split()
+
+    if dither:
+        # quantization step is 8 for red and blue, 4 for green
+        pattern8 = bayer_pattern(img.size, 8)
+        r = ImageChops.add(r, pattern8)
+        g = ImageChops.add(g, bayer_pattern(img.size, 4))
+        b = ImageChops.add(b, pattern8)
+
+    # low byte: GGGBBBBB, high byte: RRRRRGGG
+    low = ImageChops.add(
+        g.point(lambda v: ((v >> 2) & 0x07) << 5), b.point(lambda v: v >> 3)
+    )
+    high = ImageChops.add(r.point(lambda v: v & 0xF8), g.point(lambda v: v >> 5))
+
+    return Image.merge("LA", (low, high)).tobytes()
+
+
+def read_image(in_image):
+    """Read source image from file."""
     try:
-        if in_image.startswith("http"):
-            im = Image.open(requests.get(in_image, stream=True).raw)
-        else:
-            im = Image.open(in_image)
+        return pathlib.Path(in_image).read_bytes()
     except Exception:
         _LOGGER.error("Failed to open %s", in_image)
         return None
 
+
+class ImageFetcher:
+    """Download source images with shared aiohttp session.
+
+    Concurrent requests for the same URL share one download. Last sources are
+    kept with their ETag/Last-Modified for conditional requests.
+    """
+
+    timeout = 10
+    max_bytes = 10 * 1024 * 1024
+    # total size of sources kept for conditional requests
+    max_sources_size = 4 * 1024 * 1024
+
+    def __init__(self, hass):
+        """Initialize image fetcher."""
+        self.session = async_get_clientsession(hass)
+        # url => (etag, last modified, data)
+        self.sources = OrderedDict()
+        self.sources_size = 0
+        self.tasks = {}
+
+    async def fetch(self, url):
+        """Get source image content."""
+        if not (task := self.tasks.get(url)):
+            task = self.tasks[url] = asyncio.create_task(self._fetch(url))
+            task.add_done_callback(lambda _: self.tasks.pop(url, None))
+        return await asyncio.shield(task)
+
+    async def _fetch(self, url):
+        headers = {}
+        if cached := self.sources.get(url):
+            if cached[0]:
+                headers[hdrs.IF_NONE_MATCH] = cached[0]
+            if cached[1]:
+                headers[hdrs.IF_MODIFIED_SINCE] = cached[1]
+
+        try:
+            async with self.session.get(
+                url, headers=headers, timeout=ClientTimeout(total=self.timeout)
+            ) as r:
+                if r.status == 304 and cached:
+                    self.sources.move_to_end(url)
+                    return cached[2]
+
+                r.raise_for_status()
+
+                if r.content_length and r.content_length > self.max_bytes:
+                    raise ValueError(f"image is bigger than {self.max_bytes} bytes")
+
+                data = bytearray()
+                async for chunk in r.content.iter_chunked(64 * 1024):
+                    data += chunk
+                    if len(data) > self.max_bytes:
+                        raise ValueError(f"image is bigger than {self.max_bytes} bytes")
+                data = bytes(data)
+
+                etag = r.headers.get(hdrs.ETAG)
+                modified = r.headers.get(hdrs.LAST_MODIFIED)
+        except Exception as err:
+            _LOGGER.error("Failed to download %s: %s", url, err)
+            return None
+
+        if old := self.sources.pop(url, None):
+            self.sources_size -= len(old[2])
+        if (etag or modified) and len(data) <= self.max_sources_size:
+            self.sources[url] = (etag, modified, data)
+            self.sources_size += len(data)
+            while self.sources_size > self.max_sources_size:
+                _, old = self.sources.popitem(last=False)
+                self.sources_size -= len(old[2])
+
+        return data
+
+
+def image_to_rgb565(data, size, fitscreen, dither=False):
+    """Transform image to rgb565 format according to LVGL requirements."""
+    try:
+        im = Image.open(io.BytesIO(data))
+    except Exception:
+        _LOGGER.error("Failed to decode image")
+        return None
+
     original_width, original_height = im.size
     width, height = size
 
@@ -37,23 +166,140 @@ def image_to_rgb565(in_image, size, fitscreen):
         im = im.resize((height, width), Image.LANCZOS)
     width, height = im.size  # actual size after resize
 
-    out_image = tempfile.NamedTemporaryFile(mode="w+b")
+    header = struct.pack("I", height << 21 | width << 10 | 4)
+
+    out_image = header + rgb565_bytes(im.convert("RGB"), dither)
 
-    out_image.write(struct.pack("I", height << 21 | width << 10 | 4))
+    _LOGGER.debug("image_to_rgb565 out_image: %s > %s", (original_width, original_height), im.size)
 
-    img = im.convert("RGB")
+    return out_image
 
-    for pix in img.getdata():
-        r = (pix[0] >> 3) & 0x1F
-        g = (pix[1] >> 2) & 0x3F
-        b = (pix[2] >> 3) & 0x1F
-        out_image.write(struct.pack("H", (r << 11) | (g << 5) | b))
 
-    _LOGGER.debug("image_to_rgb565 out_image: %s - %s > %s", out_image.name, (original_width, original_height), im.size)
+def cache_rgb565(cache, data, size, fitscreen, dither=False):
+    """Convert image only if it is not in the cache yet, returns cache key."""
+    key = cache.key(data, size, fitscreen, dither)
+    if cache.get(key) is None:
+        out_image = image_to_rgb565(data, size, fitscreen, dither)
+        if out_image is None:
+            return None
+        cache.put(key, out_image)
 
-    out_image.flush()
+    return key
 
-    return out_image
+
+def avatar_url(url, size):
+    """Request Yandex cover in the smallest size not less than object size."""
+    match = RE_YANDEX_AVATAR.match(url)
+    if not match or not all(size):
+        return url
+    side = next(
+        (s for s in YANDEX_AVATAR_SIZES if s >= max(size)), YANDEX_AVATAR_SIZES[-1]
+    )
+    return f"{match[1]}{side}x{side}"
+
+
+def image_url(hass, image_id):
+    """Local URL of the converted image for the plate."""
+    return f"{get_url(hass, allow_external=False)}/api/openhasp/serve/{image_id}"
+
+
+async def async_prepare_image(hass, image, size, fitscreen=False, dither=False):
+    """Download and convert image, returns image id in the cache."""
+    if image.startswith("http"):
+        data = await hass.data[DOMAIN][DATA_IMAGE_FETCHER].fetch(image)
+    else:
+        data = await hass.async_add_executor_job(read_image, image)
+    if data is None:
+        return None
+
+    # only decode and resize in executor
+    return await hass.async_add_executor_job(
+        cache_rgb565, hass.data[DOMAIN][DATA_IMAGES], data, size, fitscreen, dither
+    )
+
+
+class ImageCache:
+    """LRU cache of converted images, limited by total size.
+
+    With path set, images are also saved to that directory and survive restart.
+    """
+
+    def __init__(self, max_size, path=None):
+        """Initialize image cache."""
+        self.max_size = max_size
+        self.path = path
+        # key => image size, in LRU order
+        self.sizes = OrderedDict()
+        self.images = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(data, size, fitscreen, dither):
+        """Cache key from source content and conversion params."""
+        width, height = size
+        key = hashlib.sha1(data)
+        key.update(f"{width}x{height}:{fitscreen}:{dither}".encode())
+        return key.hexdigest()
+
+    def file(self, key):
+        """Path to the image file in persistent directory."""
+        return pathlib.Path(self.path, f"{key}.bin")
+
+    def load(self):
+        """Index persistent directory (blocking)."""
+        if not self.path:
+            return
+
+        os.makedirs(self.path, exist_ok=True)
+
+        files = sorted(
+            (f.stat().st_mtime, f.stem, f.stat().st_size)
+            for f in pathlib.Path(self.path).glob("*.bin")
+        )
+        with self.lock:
+            for _, key, size in files:
+                self.sizes[key] = size
+            self.evict()
+
+    def get(self, key):
+        """Get image, may read persistent directory (blocking)."""
+        with self.lock:
+            if key not in self.sizes:
+                return None
+            self.sizes.move_to_end(key)
+
+            if key not in self.images:
+                try:
+                    self.images[key] = self.file(key).read_bytes()
+                except OSError:
+                    self.sizes.pop(key)
+                    return None
+
+            return self.images[key]
+
+    def put(self, key, image):
+        """Add image, may write persistent directory (blocking)."""
+        with self.lock:
+            self.images[key] = image
+            self.sizes[key] = len(image)
+            self.sizes.move_to_end(key)
+
+            if self.path:
+                tmp = self.file(key).with_suffix(".tmp")
+                tmp.write_bytes(image)
+                os.replace(tmp, self.file(key))
+
+            self.evict()
+
+    def evict(self):
+        """Remove least recently used images over max size, keep the last one."""
+        total = sum(self.sizes.values())
+        while total > self.max_size and len(self.sizes) > 1:
+            key, size = self.sizes.popitem(last=False)
+            self.images.pop(key, None)
+            total -= size
+            if self.path:
+                self.file(key).unlink(missing_ok=True)
 
 
 class ImageServeView(HomeAssistantView):
@@ -70,13 +316,25 @@ class ImageServeView(HomeAssistantView):
         """Serve image."""
 
         hass = request.app["hass"]
-        target_file = hass.data[DOMAIN][DATA_IMAGES].get(image_id)
-        if target_file is None:
+        cache = hass.data[DOMAIN][DATA_IMAGES]
+
+        # image_id is content based, so same id is always the same image
+        etag = f'"{image_id}"'
+        if request.headers.get(hdrs.IF_NONE_MATCH) == etag:
+            return web.Response(status=304, headers={**CACHE_HEADERS, hdrs.ETAG: etag})
+
+        image = await hass.async_add_executor_job(cache.get, image_id)
+        if image is None:
             _LOGGER.error("Unknown image_id %s", image_id)
             return web.HTTPNotFound()
 
-        _LOGGER.debug("Get Image %s form %s", image_id, target_file.name)
+        _LOGGER.debug("Get Image %s", image_id)
 
-        return web.FileResponse(
-            target_file.name, headers={**CACHE_HEADERS, hdrs.CONTENT_TYPE: "image/bmp"}
+        return web.Response(
+            body=image,
+            headers={
+                **CACHE_HEADERS,
+                hdrs.CONTENT_TYPE: "image/bmp",
+                hdrs.ETAG: etag,
+            },
         )
@@ -0,0 +1,115 @@
+"""Pages file loading and packing into MQTT payloads."""
+
+from functools import lru_cache
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import re
+
+import jsonschema
+
+_LOGGER = logging.getLogger(__name__)
+
+RE_WHITESPACE = re.compile(r"\s*")
+
+SCHEMA_PATH = pathlib.Path(__file__).parent.joinpath("pages_schema.json")
+
+# path => (mtime, size, sha1, payloads or validation error)
+PAGES_CACHE = {}
+
+
+@lru_cache(maxsize=None)
+def get_validator():
+    """Pages schema validator, compiled once per process."""
+    with open(SCHEMA_PATH, "r") as schema_file:
+        schema = json.load(schema_file)
+    cls = jsonschema.validators.validator_for(schema)
+    cls.check_schema(schema)
+    return cls(schema)
+
+
+def minify(item):
+    """Compact JSON line of pages object."""
+    return json.dumps(item, ensure_ascii=False, separators=(",", ":"))
+
+
+def parse_jsonl(text):
+    """Objects of JSONL text, objects may span several lines."""
+    decoder = json.JSONDecoder()
+    items = []
+    idx = RE_WHITESPACE.match(text).end()
+    while idx < len(text):
+        item, idx = decoder.raw_decode(text, idx)
+        items.append(item)
+        idx = RE_WHITESPACE.match(text, idx).end()
+    return items
+
+
+def pack_lines(lines, limit):
+    """Join lines into JSONL payloads not longer than limit in bytes."""
+    payloads = []
+    buffer = []
+    size = 0
+    for line in lines:
+        line_size = len(line.encode()) + 1  # \n
+        if buffer and size + line_size > limit:
+            payloads.append("\n".join(buffer) + "\n")
+            buffer = []
+            size = 0
+        buffer.append(line)
+        size += line_size
+    if buffer:
+        payloads.append("\n".join(buffer) + "\n")
+    return payloads
+
+
+def cached_result(payloads):
+    """Return cached payloads or raise cached validation error."""
+    if isinstance(payloads, jsonschema.ValidationError):
+        raise payloads
+    return payloads
+
+
+def load_pages(path, limit):
+    """Load pages file as MQTT payloads, cached until file changes.
+
+    Blocking, should be run in the executor.
+    """
+    stat = os.stat(path)
+    cached = PAGES_CACHE.get(path)
+    if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached_result(cached[3])
+
+    with open(path, "rb") as pages_file:
+        data = pages_file.read()
+
+    digest = hashlib.sha1(data).hexdigest()
+    if cached and cached[2] == digest:
+        PAGES_CACHE[path] = (stat.st_mtime_ns, stat.st_size, digest, cached[3])
+        return cached_result(cached[3])
+
+    text = data.decode()
+    if path.endswith(".json"):
+        items = json.loads(text)
+        error = jsonschema.exceptions.best_match(get_validator().iter_errors(items))
+        if error:
+            PAGES_CACHE[path] = (stat.st_mtime_ns, stat.st_size, digest, error)
+            raise error
+    else:
+        items = parse_jsonl(text)
+
+    payloads = pack_lines(
+        [minify(item) for item in items if isinstance(item, dict)], limit
+    )
+    _LOGGER.debug(
+        "Packed %s from %s to %s bytes in %s payloads",
+        os.path.basename(path),
+        len(data),
+        sum(len(payload.encode()) for payload in payloads),
+        len(payloads),
+    )
+
+    PAGES_CACHE[path] = (stat.st_mtime_ns, stat.st_size, digest, payloads)
+    return payloads
@@ -31,22 +31,25 @@ from homeassistant.helpers import (
     discovery,
     device_registry as dr,
 )
+from homeassistant.helpers.storage import Store
 
-from .core import utils
+from .core import utils, yandex_music
 from .core.const import (
     CONF_INTENTS,
     CONF_MEDIA_PLAYERS,
     DATA_CONFIG,
     DATA_SPEAKERS,
+    DATA_TTS_CACHE,
     DOMAIN,
 )
+from .core.tts_cache import TTSCache
 from .core.yandex_glagol import YandexIOListener
 from .core.yandex_quasar import YandexQuasar
 from .core.yandex_session import YandexSession
 
 _LOGGER = logging.getLogger(__name__)
 
-MAIN_DOMAINS = ["media_player", "select"]
+MAIN_DOMAINS = ["media_player", "select", "sensor"]
 SUB_DOMAINS = [
     "climate",
     "light",
@@ -55,7 +58,6 @@ SUB_DOMAINS = [
     "remote",
     "switch",
     "vacuum",
-    "sensor",
     "water_heater",
 ]
 
@@ -64,6 +66,14 @@ CONF_DEBUG = "debug"
 CONF_RECOGNITION_LANG = "recognition_lang"
 CONF_PROXY = "proxy"
 CONF_SSL = "ssl"
+CONF_ACTION_WINDOW = "action_window"
+CONF_SCENARIO_POOL = "scenario_pool"
+CONF_ONLINE_TTL = "online_ttl"
+CONF_ONLINE_TTL_STREAM = "online_ttl_stream"
+CONF_MUSIC_BITRATE = "music_bitrate"
+CONF_MEDIA_CACHE_SIZE = "media_cache_size"
+
+STORAGE_VERSION = 1
 
 CONFIG_SCHEMA = vol.Schema(
     {
@@ -88,6 +98,17 @@ CONFIG_SCHEMA = vol.Schema(
                 vol.Optional(CONF_RECOGNITION_LANG): cv.string,
                 vol.Optional(CONF_PROXY): cv.string,
                 vol.Optional(CONF_SSL): cv.boolean,
+                vol.Optional(CONF_ACTION_WINDOW): vol.All(
+                    vol.Coerce(float), vol.Range(min=0, max=1)
+                ),
+                vol.Optional(CONF_SCENARIO_POOL): vol.All(
+                    vol.Coerce(int), vol.Range(min=1, max=5)
+                ),
+                vol.Optional(CONF_ONLINE_TTL): cv.positive_int,
+                vol.Optional(CONF_ONLINE_TTL_STREAM): cv.positive_int,
+                vol.Optional(CONF_MUSIC_BITRATE): cv.positive_int,
+                # memory for proxied tracks in MB, 0 - disable cache
+                vol.Optional(CONF_MEDIA_CACHE_SIZE): cv.positive_int,
                 vol.Optional(CONF_DEBUG, default=False): cv.boolean,
             },
             extra=vol.ALLOW_EXTRA,
@@ -101,7 +122,15 @@ async def async_setup(hass: HomeAssistant, hass_config: dict):
     assert (MAJOR_VERSION, MINOR_VERSION) >= (2021, 12)
 
     config: dict = hass_config.get(DOMAIN) or {}
-    hass.data[DOMAIN] = {DATA_CONFIG: config, DATA_SPEAKERS: {}}
+
+    tts_cache = TTSCache(hass.config.path("tts"))
+    await hass.async_add_executor_job(tts_cache.scan)
+
+    hass.data[DOMAIN] = {
+        DATA_CONFIG: config,
+        DATA_SPEAKERS: {},
+        DATA_TTS_CACHE: tts_cache,
+    }
 
     if CONF_RECOGNITION_LANG in config:
         utils.fix_recognition_lang(
@@ -111,6 +140,19 @@ async def async_setup(hass: HomeAssistant, hass_config: dict):
     YandexSession.proxy = config.get(CONF_PROXY)
     YandexSession.ssl = config.get(CONF_SSL)
 
+    if CONF_ACTION_WINDOW in config:
+        YandexQuasar.action_window = config[CONF_ACTION_WINDOW]
+    if CONF_SCENARIO_POOL in config:
+        YandexQuasar.scenario_pool = config[CONF_SCENARIO_POOL]
+    if CONF_ONLINE_TTL in config:
+        YandexQuasar.online_ttl = config[CONF_ONLINE_TTL]
+    if CONF_ONLINE_TTL_STREAM in config:
+        YandexQuasar.online_ttl_stream = config[CONF_ONLINE_TTL_STREAM]
+    if CONF_MUSIC_BITRATE in config:
+        yandex_music.MAX_BITRATE = config[CONF_MUSIC_BITRATE]
+    if CONF_MEDIA_CACHE_SIZE in config:
+        utils.MediaCache.max_size = config[CONF_MEDIA_CACHE_SIZE] * 1024 * 1024
+
     await _init_local_discovery(hass)
     await _init_services(hass)
     await _setup_entry_from_config(hass)
@@ -128,21 +170,22 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     yandex = YandexSession(session, **entry.data)
     yandex.add_update_listener(update_cookie_and_token)
 
-    try:
-        ok = await yandex.refresh_cookies()
-    except Exception as e:
-        raise ConfigEntryNotReady from e
-
-    if not ok:
-        hass.components.persistent_notification.async_create(
-            "Необходимо заново авторизоваться в Яндексе. Для этого [добавьте "
-            "новую интеграцию](/config/integrations) с тем же логином.",
-            title="Yandex.Station",
-        )
-        return False
-
     quasar = YandexQuasar(yandex)
-    await quasar.init()
+    store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.unique_id}")
+
+    if snapshot := await store.async_load():
+        # fast start from the snapshot, cloud data will be loaded in background
+        quasar.restore(snapshot)
+        task = hass.async_create_task(_reconcile_entry(hass, entry, quasar, store))
+        entry.async_on_unload(task.cancel)
+    else:
+        try:
+            ok = await _load_cloud(hass, quasar, store)
+        except Exception as e:
+            raise ConfigEntryNotReady from e
+
+        if not ok:
+            return False
 
     # entry.unique_id - user login
     hass.data[DOMAIN][entry.unique_id] = quasar
@@ -155,11 +198,12 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
             device.update(speakers[did])
         speakers[did] = device
 
-    await _setup_intents(hass, quasar)
     await _setup_include(hass, entry)
     await _setup_devices(hass, quasar)
 
-    quasar.start()
+    if not snapshot:
+        await _setup_intents(hass, quasar)
+        quasar.start()
 
     for domain in MAIN_DOMAINS:
         hass.async_create_task(
@@ -176,6 +220,47 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
     )
 
 
+async def _load_cloud(hass: HomeAssistant, quasar: YandexQuasar, store: Store):
+    """Load devices and scenarios from Yandex cloud and save the snapshot."""
+    if not await quasar.session.refresh_cookies():
+        hass.components.persistent_notification.async_create(
+            "Необходимо заново авторизоваться в Яндексе. Для этого [добавьте "
+            "новую интеграцию](/config/integrations) с тем же логином.",
+            title="Yandex.Station",
+        )
+        return False
+
+    await quasar.init()
+    await quasar.load_speakers()
+
+    await store.async_save(quasar.snapshot())
+
+    return True
+
+
+async def _reconcile_entry(
+    hass: HomeAssistant, entry: ConfigEntry, quasar: YandexQuasar, store: Store
+):
+    """Update entities created from the snapshot with data from the cloud."""
+    snapshot_ids = {device["id"] for device in quasar.devices}
+    try:
+        if not await _load_cloud(hass, quasar, store):
+            return
+    except Exception as e:
+        # updates stream will try to load devices again
+        _LOGGER.warning("Can't load devices from Yandex", exc_info=e)
+    else:
+        if snapshot_ids != {device["id"] for device in quasar.devices}:
+            # devices were added or removed since the snapshot, entities are
+            # created again from the new snapshot
+            _LOGGER.info("Devices list changed, reload entry")
+            hass.async_create_task(hass.config_entries.async_reload(entry.entry_id))
+            return
+
+    await _setup_intents(hass, quasar)
+    quasar.start()
+
+
 async def _init_local_discovery(hass: HomeAssistant):
     """Init descovery local speakers with Zeroconf (mDNS)."""
     speakers: dict = hass.data[DOMAIN][DATA_SPEAKERS]
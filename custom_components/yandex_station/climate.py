@@ -26,8 +26,7 @@ async def async_setup_entry(hass, entry, async_add_entities):
     quasar = hass.data[DOMAIN][entry.unique_id]
     entities = [
         YandexClimate(quasar, device, config)
-        for device in quasar.devices
-        if (config := utils.device_include(device, include, INCLUDE_TYPES))
+        for device, config in quasar.index.include(include, INCLUDE_TYPES)
     ]
     async_add_entities(entities, True)
 
@@ -5,3 +5,4 @@ CONF_MEDIA_PLAYERS = "media_players"
 
 DATA_CONFIG = "config"
 DATA_SPEAKERS = "speakers"
+DATA_TTS_CACHE = "tts_cache"
@@ -0,0 +1,89 @@
+import logging
+import os
+import threading
+from typing import Optional
+
+from homeassistant.core import HomeAssistant
+from yarl import URL
+
+from .utils import TTS_MESSAGES, cache_tts_message, id3_size, parse_tts_message
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class TTSCache:
+    """Index of Hass TTS cache folder. So TTS message can be read from local
+    file without HTTP request to the tts_proxy. Folder is owned by Hass TTS,
+    so files are never removed here.
+
+    File name: {hash}_{language}_{options}_{engine}.{ext}
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        # file name => file info
+        self.files: dict[str, dict] = {}
+        # index is changed from executor threads
+        self.lock = threading.Lock()
+
+    def scan(self):
+        """Index whole folder, used once on start (blocking)."""
+        try:
+            names = os.listdir(self.path)
+        except FileNotFoundError:
+            return
+        for name in names:
+            self.add(name)
+
+    def add(self, name: str) -> Optional[dict]:
+        """Index one file, so new message costs O(1) (blocking)."""
+        try:
+            hash_, language, options, engine = name.split("_", 3)
+            path = os.path.join(self.path, name)
+            stat = os.stat(path)
+        except (ValueError, OSError):
+            return None
+        info = {
+            "hash": hash_,
+            "language": language,
+            "options": options,
+            "engine": engine.rsplit(".", 1)[0],
+            "path": path,
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+        }
+        with self.lock:
+            self.files[name] = info
+        return info
+
+    def get_message(self, name: str) -> Optional[str]:
+        """Read message from ID3 tag of local file (blocking)."""
+        if not (info := self.files.get(name) or self.add(name)):
+            return None
+
+        try:
+            with open(info["path"], "rb") as f:
+                data = f.read(10)
+                data += f.read(id3_size(data) - len(data))
+        except FileNotFoundError:
+            # removed by Hass TTS
+            with self.lock:
+                self.files.pop(name, None)
+            return None
+
+        return parse_tts_message(data)
+
+    async def async_get_message(self, hass: HomeAssistant, url: str):
+        name = URL(url).name
+        if name in TTS_MESSAGES:
+            return TTS_MESSAGES[name]
+
+        try:
+            text = await hass.async_add_executor_job(self.get_message, name)
+        except Exception as e:
+            _LOGGER.debug(f"Can't read TTS file {name}: {e}")
+            return None
+
+        if text:
+            cache_tts_message(name, text)
+        return text
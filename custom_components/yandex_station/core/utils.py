@@ -1,12 +1,14 @@
+import asyncio
 import hashlib
 import json
 import logging
 import os
 import re
 import uuid
+from collections import OrderedDict
 from datetime import datetime
 from logging import Logger
-from typing import Callable, List
+from typing import Callable, Dict, List, Optional
 
 from aiohttp import ClientSession, web
 from homeassistant.components import frontend
@@ -243,33 +245,79 @@ async def get_zeroconf_singleton(hass: HomeAssistantType):
 
 RE_ID3 = re.compile(rb"(Text|TIT2)(....)\x00\x00\x03(.+?)\x00", flags=re.DOTALL)
 
+# max bytes to read from the start of TTS file
+ID3_MAX_SIZE = 64 * 1024
+
+# TTS file name => message text
+TTS_MESSAGES: Dict[str, str] = {}
+TTS_MESSAGES_SIZE = 100
+
+
+def id3_size(data: bytes) -> int:
+    """Size of ID3 tag from the file header, limited by max size."""
+    if len(data) >= 10 and data[:3] == b"ID3":
+        # tag size is syncsafe integer, 7 bits per byte
+        size = 10 + sum(b << (7 * i) for i, b in enumerate(data[9:5:-1]))
+        return min(size, ID3_MAX_SIZE)
+    return ID3_MAX_SIZE
+
+
+async def read_id3(r) -> bytes:
+    """Read only ID3 tag from the start of the file, skip audio data."""
+    data = b""
+    async for chunk in r.content.iter_any():
+        data += chunk
+        if len(data) >= id3_size(data):
+            break
+    return data[: id3_size(data)]
+
+
+def parse_tts_message(data: bytes) -> Optional[str]:
+    m = RE_ID3.findall(data)
+    if len(m) == 1 and m[0][0] == b"TIT2":
+        # old Hass version has valid ID3 tags with `TIT2` for Title
+        _LOGGER.debug("Получение TTS из ID3")
+        m = m[0]
+    elif len(m) == 3 and m[2][0] == b"Text":
+        # latest Hass version has bug with `Text` for all tags
+        # there are 3 tags and the last one we need
+        _LOGGER.debug("Получение TTS из битого ID3")
+        m = m[2]
+    else:
+        _LOGGER.debug(f"Невозможно получить TTS: {data}")
+        return None
+
+    # check tag value length
+    if int.from_bytes(m[1], "big") - 2 == len(m[2]):
+        return m[2].decode("utf-8")
+
+    return None
+
+
+def cache_tts_message(key: str, text: str):
+    """Remember message text by TTS file name, oldest messages are dropped."""
+    if len(TTS_MESSAGES) >= TTS_MESSAGES_SIZE:
+        TTS_MESSAGES.pop(next(iter(TTS_MESSAGES)))
+    TTS_MESSAGES[key] = text
+
 
 async def get_tts_message(session: ClientSession, url: str):
     """Текст сообщения записывается в файл в виде ID3-тегов. Нужно скачать файл
     и прочитать этот тег. В старых версиях ХА валидный ID3-тег, а в новых -
     битый.
     """
+    # file name is the hash of the message and TTS options
+    key = URL(url).name
+    if key in TTS_MESSAGES:
+        return TTS_MESSAGES[key]
+
     try:
-        r = await session.get(url, ssl=False)
-        data = await r.read()
-
-        m = RE_ID3.findall(data)
-        if len(m) == 1 and m[0][0] == b"TIT2":
-            # old Hass version has valid ID3 tags with `TIT2` for Title
-            _LOGGER.debug("Получение TTS из ID3")
-            m = m[0]
-        elif len(m) == 3 and m[2][0] == b"Text":
-            # latest Hass version has bug with `Text` for all tags
-            # there are 3 tags and the last one we need
-            _LOGGER.debug("Получение TTS из битого ID3")
-            m = m[2]
-        else:
-            _LOGGER.debug(f"Невозможно получить TTS: {data}")
-            return None
+        async with session.get(url, ssl=False) as r:
+            data = await read_id3(r)
 
-        # check tag value length
-        if int.from_bytes(m[1], "big") - 2 == len(m[2]):
-            return m[2].decode("utf-8")
+        if text := parse_tts_message(data):
+            cache_tts_message(key, text)
+            return text
 
     except:
         _LOGGER.exception("Ошибка получения сообщения TTS")
@@ -420,27 +468,6 @@ def decode_media_source(media_id: str) -> dict:
     return dict(url.query)
 
 
-INCLUDE_KEYS = ("id", "name", "type", "room_name", "skill_id")
-
-
-def device_include(
-    device: dict, include: list[dict], types: list[str] = None
-) -> dict | None:
-    if types and device["type"] not in types:
-        return None
-
-    for item in include:
-        if isinstance(item, str):
-            if item == device["name"]:
-                return {"name": item}
-        elif isinstance(item, dict):
-            # one and more INCLUDE_KEYS should match
-            if sum(item[k] == device.get(k) for k in INCLUDE_KEYS if k in item):
-                return item
-
-    return None
-
-
 def instance_include(instance: dict, include: list[str], types: list[str]) -> bool:
     if instance["type"] not in types:
         return False
@@ -462,6 +489,109 @@ def track_template(hass: HomeAssistant, template: str, update: Callable) -> Call
     return track.async_remove
 
 
+# same chunks as default web.FileResponse
+CHUNK_SIZE = 256 * 1024
+
+
+class MediaTrack:
+    """Track data, filled progressively while downloading."""
+
+    def __init__(self):
+        self.data = bytearray()
+        # Content-Length from upstream, None - unknown or download error
+        self.size: Optional[int] = None
+        self.done = False
+        self.ready = asyncio.Event()
+        self.updated = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        # number of responses streaming this track now
+        self.readers = 0
+
+    def append(self, chunk: bytes):
+        self.data += chunk
+        self.updated.set()
+        self.updated = asyncio.Event()
+
+    def finish(self):
+        self.done = True
+        self.ready.set()
+        self.updated.set()
+
+    async def read(self, start: int, end: int):
+        """Yields data from start to end, waits for the download if needed."""
+        while start < end:
+            if start < len(self.data):
+                chunk = bytes(self.data[start : min(end, start + CHUNK_SIZE)])
+                start += len(chunk)
+                yield chunk
+            elif self.done:
+                return
+            else:
+                await self.updated.wait()
+
+
+class MediaCache:
+    """LRU memory cache for proxied tracks, limited by total size."""
+
+    # total size in bytes, 0 - tracks are always proxied
+    max_size = 20 * 1024 * 1024
+    # requests far from downloaded data will be proxied to upstream
+    far_range = 1024 * 1024
+
+    def __init__(self, session: ClientSession):
+        self.session = session
+        self.tracks: Dict[str, MediaTrack] = OrderedDict()
+
+    def peek(self, uid: str) -> Optional[MediaTrack]:
+        """Returns cached track with known size, never starts download."""
+        track = self.tracks.get(uid)
+        return track if track and track.size is not None else None
+
+    async def get(self, uid: str, url: str) -> Optional[MediaTrack]:
+        if track := self.tracks.get(uid):
+            self.tracks.move_to_end(uid)
+        else:
+            track = self.tracks[uid] = MediaTrack()
+            track.task = asyncio.create_task(self._download(uid, url, track))
+
+        await track.ready.wait()
+
+        return track if track.size is not None else None
+
+    async def _download(self, uid: str, url: str, track: MediaTrack):
+        try:
+            async with self.session.get(url) as r:
+                r.raise_for_status()
+                track.size = int(r.headers["Content-Length"])
+                track.ready.set()
+
+                self._evict()
+
+                async for chunk in r.content.iter_chunked(CHUNK_SIZE):
+                    track.append(chunk)
+        except Exception as e:
+            _LOGGER.debug(f"Can't download track: {e}")
+            # don't keep incomplete track
+            if self.tracks.get(uid) is track:
+                self.tracks.pop(uid)
+        finally:
+            track.finish()
+
+    def _evict(self):
+        total = sum(track.size or 0 for track in self.tracks.values())
+        # keep at least last track and tracks that are streamed now, because
+        # their responses already promised full Content-Length
+        for uid, track in list(self.tracks.items())[:-1]:
+            if total <= self.max_size:
+                break
+            if track.readers:
+                continue
+            self.tracks.pop(uid)
+            total -= track.size or 0
+            if not track.done:
+                track.task.cancel()
+
+
 class StreamingView(HomeAssistantView):
     requires_auth = False
 
@@ -472,6 +602,7 @@ class StreamingView(HomeAssistantView):
 
     def __init__(self, hass: HomeAssistant):
         self.session = async_get_clientsession(hass)
+        self.cache = MediaCache(self.session)
 
     @staticmethod
     def get_url(hass: HomeAssistant, sid: str, url: str):
@@ -480,27 +611,78 @@ class StreamingView(HomeAssistantView):
         StreamingView.links[sid] = url
         return f"{network.get_url(hass)}/api/yandex_station/{sid}/{uid}.mp3"
 
+    @staticmethod
+    def headers(length: int) -> dict:
+        return {
+            "Accept-Ranges": "bytes",
+            # important for DLNA players
+            "Content-Type": "audio/mpeg",
+            # inportant for SamsungTV
+            "Content-Length": str(length),
+        }
+
     async def head(self, request: web.Request, sid: str, uid: str):
         url: str = self.links.get(sid)
         if not url or hashlib.md5(url.encode()).hexdigest() != uid:
             return web.HTTPNotFound()
 
+        # HEAD shouldn't start download of the whole track
+        if track := self.cache.peek(uid):
+            return web.Response(headers=self.headers(track.size))
+
         async with self.session.head(url) as r:
-            return web.Response(
-                headers={
-                    "Accept-Ranges": "bytes",
-                    # important for DLNA players
-                    "Content-Type": "audio/mpeg",
-                    # inportant for SamsungTV
-                    "Content-Length": r.headers["Content-Length"],
-                }
-            )
+            return web.Response(headers=self.headers(int(r.headers["Content-Length"])))
 
     async def get(self, request: web.Request, sid: str, uid: str):
         url: str = self.links.get(sid)
         if not url or hashlib.md5(url.encode()).hexdigest() != uid:
             return web.HTTPNotFound()
 
+        if not self.cache.max_size:
+            return await self.proxy(request, url)
+
+        track = await self.cache.get(uid, url)
+        if not track:
+            return await self.proxy(request, url)
+
+        try:
+            start, end, _ = request.http_range.indices(track.size)
+        except ValueError:
+            return web.HTTPRequestRangeNotSatisfiable()
+
+        if start >= end and track.size:
+            return web.HTTPRequestRangeNotSatisfiable()
+
+        if not track.done and start > len(track.data) + self.cache.far_range:
+            return await self.proxy(request, url)
+
+        response = web.StreamResponse(headers=self.headers(end - start))
+        if "Range" in request.headers:
+            response.set_status(206)
+            response.headers["Content-Range"] = f"bytes {start}-{end - 1}/{track.size}"
+
+        sent = 0
+        track.readers += 1
+        try:
+            await response.prepare(request)
+            async for chunk in track.read(start, end):
+                await response.write(chunk)
+                sent += len(chunk)
+        except Exception as e:
+            # usually player closed connection
+            _LOGGER.debug(f"Stream {uid} stopped: {repr(e)}")
+        else:
+            if sent < end - start:
+                # download failed after Content-Length was sent to the player
+                _LOGGER.warning(
+                    f"Stream {uid} ended after {sent} of {end - start} bytes"
+                )
+        finally:
+            track.readers -= 1
+
+        return response
+
+    async def proxy(self, request: web.Request, url: str):
         try:
             rng = request.headers.get("Range")
             headers = {"Range": rng} if rng else None
@@ -509,8 +691,7 @@ class StreamingView(HomeAssistantView):
                 response.headers.update(r.headers)
                 await response.prepare(request)
 
-                # same chunks as default web.FileResponse
-                async for chunk in r.content.iter_chunked(256 * 1024):
+                async for chunk in r.content.iter_chunked(CHUNK_SIZE):
                     await response.write(chunk)
         except Exception:
             pass
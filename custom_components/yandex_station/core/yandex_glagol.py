@@ -5,7 +5,7 @@ import logging
 import time
 import uuid
 from asyncio import Future
-from typing import Callable, Dict, Optional
+from typing import Callable, Dict, List, Optional
 
 from aiohttp import ClientConnectorError, ClientWebSocketResponse, WSMsgType
 from zeroconf import ServiceBrowser, ServiceStateChange, Zeroconf
@@ -26,12 +26,15 @@ class YandexGlagol:
     # keep_task: Task = None
     update_handler: Callable = None
 
-    waiters: Dict[str, Future] = {}
+    # max commands waiting for the response
+    inflight_limit: int = 8
 
     def __init__(self, session: YandexSession, device: dict):
         self.session = session
         self.device = device
         self.loop = asyncio.get_event_loop()
+        self.waiters: Dict[str, Future] = {}
+        self.inflight = asyncio.Semaphore(self.inflight_limit)
 
     def debug(self, text: str):
         _LOGGER.debug(f"{self.device['name']} | {text}")
@@ -125,9 +128,7 @@ class YandexGlagol:
                         except Exception as e:
                             _LOGGER.debug(f"Response error: {e}")
 
-                    request_id = data.get("requestId")
-                    if request_id in self.waiters:
-                        self.waiters[request_id].set_result(response)
+                    self._resolve(data.get("requestId"), response)
 
                     self.update_handler(data)
 
@@ -146,12 +147,16 @@ class YandexGlagol:
             self.debug(f"Останавливаем подключение: {e}")
             if self.ws and not self.ws.closed:
                 await self.ws.close()
+            self._resolve_all()
             return
 
         except:
             _LOGGER.exception(f"{self.name} | Station connect")
             fails += 1
 
+        # ответов на отправленные команды уже не будет
+        self._resolve_all()
+
         # возвращаемся в облачный режим
         self.update_handler(None)
 
@@ -188,11 +193,36 @@ class YandexGlagol:
         except:
             pass
 
-    async def send(self, payload: dict) -> Optional[dict]:
+    async def send(self, payload: dict, timeout: float = 5) -> Optional[dict]:
+        return (await self.send_batch([payload], timeout))[0]
+
+    async def send_batch(
+        self, payloads: List[dict], timeout: float = 5
+    ) -> List[Optional[dict]]:
+        """Sends commands back-to-back without waiting for each response.
+        Returns responses in the same order, None on timeout or error.
+        """
+        waiters = [await self._send(payload, timeout) for payload in payloads]
+        return await asyncio.gather(*waiters)
+
+    async def _send(self, payload: dict, timeout: float) -> Future:
         _LOGGER.debug(f"{self.name} => local | {payload}")
 
+        await self.inflight.acquire()
+
         request_id = str(uuid.uuid4())
 
+        # waiter should exist before send, response may come very fast
+        waiter = self.waiters[request_id] = self.loop.create_future()
+        timer = self.loop.call_later(timeout, self._resolve, request_id, None)
+
+        def done(_):
+            timer.cancel()
+            self.waiters.pop(request_id, None)
+            self.inflight.release()
+
+        waiter.add_done_callback(done)
+
         try:
             await self.ws.send_json(
                 {
@@ -202,21 +232,20 @@ class YandexGlagol:
                     "sentTime": int(round(time.time() * 1000)),
                 }
             )
+        except Exception as e:
+            _LOGGER.error(e)
+            self._resolve(request_id, None)
 
-            self.waiters[request_id] = self.loop.create_future()
-
-            # limit future wait time
-            await asyncio.wait_for(self.waiters[request_id], 5)
-
-            # self.next_ping_ts = time.time() + 0.5
-
-            return self.waiters.pop(request_id).result()
+        return waiter
 
-        except asyncio.TimeoutError:
-            _ = self.waiters.pop(request_id, None)
+    def _resolve(self, request_id: Optional[str], response: Optional[dict]):
+        waiter = self.waiters.get(request_id)
+        if waiter and not waiter.done():
+            waiter.set_result(response)
 
-        except Exception as e:
-            _LOGGER.error(e)
+    def _resolve_all(self):
+        for request_id in list(self.waiters):
+            self._resolve(request_id, None)
 
     async def reset_session(self):
         payload = {
@@ -1,40 +1,105 @@
+import asyncio
 import hashlib
 import operator
 import re
+import time
+from typing import Optional
 
 from .yandex_session import YandexSession
 
 XML = re.compile(r"<(host|path|ts|s)>([^<]+)")
 ID = re.compile(r"\.(\d+)-")
 
+# signed links lifetime, seconds
+URL_TTL = 120
+# max mp3 bitrate in kbps, 0 - best available
+MAX_BITRATE = 0
+
+# track => (expire time, download info, (host, path, ts, s))
+CACHE: dict[str, tuple[float, dict, tuple]] = {}
+# track => running lookup, so concurrent calls resolve same track only once
+TASKS: dict[str, asyncio.Task] = {}
+
+
+def get_cached(*tracks: str) -> Optional[tuple]:
+    ts = time.time()
+    for track in tracks:
+        if (item := CACHE.get(track)) and item[0] > ts:
+            return item
+    return None
+
 
 async def get_mp3(session: YandexSession, player_state: dict):
     try:
         tid = player_state["id"]
         aid = ID.search(player_state["extra"]["coverURI"])[1]
+        track = f"{tid}:{aid}"
 
-        # thanks to https://github.com/MarshalX/yandex-music-api
-        r = await session.get(
-            f"https://api.music.yandex.net/tracks/{tid}:{aid}/download-info",
-        )
-        res = await r.json()
+        # next track may be prefetched without album
+        item = get_cached(track, tid) or await lookup(session, track)
 
-        res = sorted(
-            [p for p in res["result"] if p["codec"] == "mp3"],
-            key=operator.itemgetter("bitrateInKbps"),
-            reverse=True,
-        )
+        return sign_url(*item[2])
 
-        r = await session.session.get(res[0]["downloadInfoUrl"])
-        res = await r.text()
+    except Exception:
+        return None
 
-        doc = dict(XML.findall(res))
 
-        sign = hashlib.md5(
-            ("XGRlBW9FXlekgbPrRHuSiA" + doc["path"][1:] + doc["s"]).encode()
-        ).hexdigest()
+async def prefetch_mp3(session: YandexSession, tid: str):
+    """Resolve next track from the queue before it starts, album is unknown."""
+    if get_cached(tid):
+        return
+    try:
+        await lookup(session, tid)
+    except Exception:
+        pass
 
-        return f"https://{doc['host']}/get-mp3/{sign}/{doc['ts']}{doc['path']}"
 
-    except Exception:
-        return None
+async def lookup(session: YandexSession, track: str) -> tuple:
+    if not (task := TASKS.get(track)):
+        task = TASKS[track] = asyncio.create_task(_lookup(session, track))
+        task.add_done_callback(lambda _: TASKS.pop(track, None))
+    # cancel of one caller shouldn't cancel lookup for others
+    return await asyncio.shield(task)
+
+
+async def _lookup(session: YandexSession, track: str) -> tuple:
+    # thanks to https://github.com/MarshalX/yandex-music-api
+    r = await session.get(
+        f"https://api.music.yandex.net/tracks/{track}/download-info",
+    )
+    res = await r.json()
+
+    info = select_info(res["result"])
+
+    r = await session.session.get(info["downloadInfoUrl"])
+    res = await r.text()
+
+    doc = dict(XML.findall(res))
+
+    ts = time.time()
+    # remove expired items
+    for key in [k for k, v in CACHE.items() if v[0] <= ts]:
+        CACHE.pop(key)
+
+    CACHE[track] = item = (
+        ts + URL_TTL,
+        info,
+        (doc["host"], doc["path"], doc["ts"], doc["s"]),
+    )
+    return item
+
+
+def select_info(items: list[dict]) -> dict:
+    items = sorted(
+        [p for p in items if p["codec"] == "mp3"],
+        key=operator.itemgetter("bitrateInKbps"),
+        reverse=True,
+    )
+    if MAX_BITRATE:
+        return next((p for p in items if p["bitrateInKbps"] <= MAX_BITRATE), items[-1])
+    return items[0]
+
+
+def sign_url(host: str, path: str, ts: str, s: str) -> str:
+    sign = hashlib.md5(("XGRlBW9FXlekgbPrRHuSiA" + path[1:] + s).encode()).hexdigest()
+    return f"https://{host}/get-mp3/{sign}/{ts}{path}"
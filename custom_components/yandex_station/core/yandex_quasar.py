@@ -1,12 +1,14 @@
 import asyncio
 import json
 import logging
+import random
+import time
 from datetime import datetime
 from typing import Optional
 
 from aiohttp import WSMsgType
 
-from .yandex_session import YandexSession
+from .yandex_session import PRIORITY_HIGH, PRIORITY_LOW, YandexSession
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -40,6 +42,9 @@ IOT_TYPES = {
 MASK_EN = "0123456789abcdef-"
 MASK_RU = "оеаинтсрвлкмдпуяы"
 
+# items with events, same value should be delivered again
+EVENT_TYPES = ("devices.capabilities.quasar.server_action", "devices.properties.event")
+
 URL_USER = "https://iot.quasar.yandex.ru/m/user"
 URL_V3_USER = "https://iot.quasar.yandex.ru/m/v3/user"
 
@@ -59,6 +64,47 @@ def decode(uid: str) -> Optional[str]:
         return None
 
 
+def encode_slot(uid: str, slot: int) -> str:
+    """Имя сценария из пула колонки. Нулевой слот - основной сценарий."""
+    name = encode(uid)
+    return f"{name[:22]} {MASK_RU[slot]}" if slot else name
+
+
+def decode_slot(name: str) -> Optional[tuple[str, int]]:
+    """Раскодируем UID и номер слота дополнительного сценария."""
+    if len(name) < 5 or name[-2] != " " or name[-1] not in MASK_RU:
+        return None
+    uid = decode(name[:-2])
+    return (uid, MASK_RU.index(name[-1])) if uid else None
+
+
+def scenario_payload(name: str, device_id: str, action: str, value: str) -> dict:
+    return {
+        "name": name[:25],
+        "icon": "home",
+        "triggers": [{"type": "scenario.trigger.voice", "value": name[3:]}],
+        "steps": [
+            {
+                "type": "scenarios.steps.actions",
+                "parameters": {
+                    "requested_speaker_capabilities": [],
+                    "launch_devices": [
+                        {
+                            "id": device_id,
+                            "capabilities": [
+                                {
+                                    "type": "devices.capabilities.quasar.server_action",
+                                    "state": {"instance": action, "value": value},
+                                }
+                            ],
+                        }
+                    ],
+                },
+            }
+        ],
+    }
+
+
 def parse_scenario(data: dict) -> dict:
     result = {
         k: v
@@ -126,24 +172,158 @@ class Dispatcher:
             target(message)
 
 
+class DeviceIndex:
+    """In-memory index of cloud devices, so entity polls and platform setup
+    don't scan the whole devices list.
+    """
+
+    KEYS = ("id", "name", "type", "room_name", "skill_id")
+    # fields, that can be changed from the updates stream
+    MUTABLE = ("name", "type", "room_name", "skill_id", "state")
+
+    def __init__(self):
+        self.keys: dict[str, dict[str, list[dict]]] = {k: {} for k in self.KEYS}
+        # quasar_info.device_id => device
+        self.quasar: dict[str, dict] = {}
+        self.speakers: list[dict] = []
+        self.modules: list[dict] = []
+
+    def rebuild(self, devices: list[dict]):
+        self.keys = {k: {} for k in self.KEYS}
+        self.quasar = {}
+        self.speakers = []
+        self.modules = []
+
+        for device in devices:
+            self._add_keys(device)
+
+            if info := device.get("quasar_info"):
+                self.quasar[info["device_id"]] = device
+                if device.get("capabilities"):
+                    self.speakers.append(device)
+                else:
+                    # modules don't have cloud scenarios
+                    self.modules.append(device)
+
+    def _add_keys(self, device: dict):
+        for k in self.KEYS:
+            if (value := device.get(k)) is not None:
+                self.keys[k].setdefault(value, []).append(device)
+
+    def _remove_keys(self, device: dict):
+        for k in self.KEYS:
+            if items := self.keys[k].get(device.get(k)):
+                items[:] = [i for i in items if i is not device]
+
+    def get(self, key: str, value) -> list[dict]:
+        return self.keys[key].get(value, [])
+
+    def get_device(self, device_id: str) -> Optional[dict]:
+        """Search device by cloud ID or by quasar device_id."""
+        if items := self.keys["id"].get(device_id):
+            return items[0]
+        return self.quasar.get(device_id)
+
+    def update(self, data: dict):
+        """Merge device fields from the updates stream."""
+        if not (device := self.get_device(data["id"])):
+            return
+
+        changed = {
+            k: data[k] for k in self.MUTABLE if k in data and data[k] != device.get(k)
+        }
+        if not changed:
+            return
+
+        reindex = any(k in self.KEYS for k in changed)
+        if reindex:
+            self._remove_keys(device)
+        device.update(changed)
+        if reindex:
+            self._add_keys(device)
+
+    def include(self, include: list, types: list[str] = None) -> list[tuple]:
+        """Return (device, config) pairs for devices from YAML include. One and
+        more INCLUDE_KEYS should match. First matched config wins.
+        """
+        result = {}
+        for item in include:
+            if isinstance(item, str):
+                devices = self.get("name", item)
+                config = {"name": item}
+            elif isinstance(item, dict):
+                devices = [
+                    device
+                    for k in self.KEYS
+                    if k in item
+                    for device in self.get(k, item[k])
+                ]
+                config = item
+            else:
+                continue
+
+            for device in devices:
+                if types and device["type"] not in types:
+                    continue
+                result.setdefault(id(device), (device, config))
+
+        return list(result.values())
+
+
 class YandexQuasar(Dispatcher):
     # all devices
     devices: list[dict] = None
+    cloud_devices: list[dict] = None
     scenarios: list[dict] = None
-    online_updated: asyncio.Event = None
     updates_task: asyncio.Task = None
 
+    # seconds while speakers online stats are fresh
+    online_ttl: float = 60
+    # used while updates stream is connected, online state also comes from it
+    online_ttl_stream: float = 600
+    online_ts: float = 0
+    online_task: asyncio.Task = None
+    # time when updates stream was connected, 0 - not connected
+    stream_ts: float = 0
+    # time of last message from updates stream
+    message_ts: float = 0
+    reconnects: int = 0
+    # delay between device state change and its update message, seconds
+    message_lag: Optional[float] = None
+
+    # reconnect backoff range in seconds
+    reconnect_min: float = 0.5
+    reconnect_max: float = 60
+
+    # seconds to collect device actions before send, 0 - send immediately
+    action_window: float = 0.04
+    actions_timer: asyncio.TimerHandle = None
+
+    # number of cloud scenarios for each speaker
+    scenario_pool: int = 2
+
     def __init__(self, session: YandexSession):
         super().__init__()
         self.session = session
-        self.online_updated = asyncio.Event()
-        self.online_updated.set()
+        self.index = DeviceIndex()
+        # last known capabilities and properties values for each device
+        self.last_values: dict[str, dict] = {}
+        self.updates_stats = {"delivered": 0, "suppressed": 0}
+        self.pending_actions: dict[str, dict] = {}
+        self.pending_waiters: dict[str, list[asyncio.Future]] = {}
+        # strong refs, so running flushes are not garbage collected
+        self.action_tasks: set[asyncio.Task] = set()
+        # last flush of each device, so batches are posted in order
+        self.last_flush: dict[str, asyncio.Task] = {}
+        # last scenario payload, so same TTS or command won't be updated again
+        self.scenario_cache: dict[str, dict] = {}
+        self.scenario_slots: dict[str, tuple[tuple, asyncio.Queue]] = {}
+        self.send_order: dict[str, asyncio.Future] = {}
 
     @property
     def hass_id(self):
-        for device in self.devices:
-            if device["name"] == "Yandex Intents":
-                return device["id"]
+        for device in self.index.get("name", "Yandex Intents"):
+            return device["id"]
         return None
 
     async def init(self):
@@ -154,29 +334,72 @@ class YandexQuasar(Dispatcher):
         resp = await r.json()
         assert resp["status"] == "ok", resp
 
-        self.devices = []
+        devices = []
 
         for house in resp["households"]:
             if "sharing_info" in house:
                 continue
-            self.devices += house["all"]
+            devices += house["all"]
+
+        # cloud data copy for the snapshot, without local speakers data
+        self.cloud_devices = [device.copy() for device in devices]
+
+        self.merge_devices(devices)
 
         await self.load_scenarios()
 
+    def merge_devices(self, devices: list[dict]):
+        """Update devices list in place, so entities keep their device dicts."""
+        known = {device["id"]: device for device in self.devices or []}
+
+        self.devices = []
+
+        for device in devices:
+            if prev := known.get(device["id"]):
+                prev.update(device)
+                self.devices.append(prev)
+            else:
+                self.devices.append(device)
+
+        self.index.rebuild(self.devices)
+
+        for device in self.devices:
+            if device["id"] in known:
+                # changes between the snapshot and the cloud
+                self.dispatch_changes(device)
+            else:
+                self.diff_device(device)
+
+    def snapshot(self) -> dict:
+        """Data for fast start without the cloud."""
+        return {
+            "devices": self.cloud_devices,
+            "scenarios": self.scenarios,
+            "scenario_ids": {
+                speaker["id"]: speaker["scenario_ids"]
+                for speaker in self.speakers
+                if "scenario_ids" in speaker
+            },
+        }
+
+    def restore(self, data: dict):
+        self.cloud_devices = [device.copy() for device in data["devices"]]
+        self.scenarios = data["scenarios"]
+
+        self.merge_devices(data["devices"])
+
+        for speaker in self.speakers:
+            if ids := data["scenario_ids"].get(speaker["id"]):
+                speaker["scenario_id"] = ids[0]
+                speaker["scenario_ids"] = ids
+
     @property
-    def speakers(self):
-        return [
-            d for d in self.devices if d.get("quasar_info") and d.get("capabilities")
-        ]
+    def speakers(self) -> list[dict]:
+        return self.index.speakers
 
     @property
-    def modules(self):
-        # modules don't have cloud scenarios
-        return [
-            d
-            for d in self.devices
-            if d.get("quasar_info") and not d.get("capabilities")
-        ]
+    def modules(self) -> list[dict]:
+        return self.index.modules
 
     async def load_speakers(self) -> list:
         speakers = self.speakers
@@ -187,6 +410,7 @@ class YandexQuasar(Dispatcher):
         #     await self.load_speaker_config(speaker)
 
         scenarios = {decode(d["name"]): d for d in self.scenarios if decode(d["name"])}
+        slots = {slot: d for d in self.scenarios if (slot := decode_slot(d["name"]))}
 
         for speaker in speakers:
             device_id: str = speaker["id"]
@@ -199,6 +423,20 @@ class YandexQuasar(Dispatcher):
                 scenario = await self.add_scenario(device_id)
 
             speaker["scenario_id"] = scenario["id"]
+            speaker["scenario_ids"] = [scenario["id"]]
+
+            # additional scenarios for pipelining back-to-back TTS
+            for i in range(1, self.scenario_pool):
+                try:
+                    scenario = next(
+                        v
+                        for (k, slot), v in slots.items()
+                        if slot == i and device_id.startswith(k)
+                    )
+                except StopIteration:
+                    scenario = await self.add_scenario(device_id, i)
+
+                speaker["scenario_ids"].append(scenario["id"])
 
         return speakers
 
@@ -244,40 +482,12 @@ class YandexQuasar(Dispatcher):
         resp = await r.json()
         assert resp["status"] == "ok", resp
 
-    async def add_scenario(self, device_id: str) -> dict:
+    async def add_scenario(self, device_id: str, slot: int = 0) -> dict:
         """Добавляет сценарий-пустышку."""
-        name = encode(device_id)
-        payload = {
-            "name": name[:25],
-            "icon": "home",
-            "triggers": [{"type": "scenario.trigger.voice", "value": name[3:]}],
-            "steps": [
-                {
-                    "type": "scenarios.steps.actions",
-                    "parameters": {
-                        "requested_speaker_capabilities": [],
-                        "launch_devices": [
-                            {
-                                "id": device_id,
-                                "capabilities": [
-                                    {
-                                        "type": "devices.capabilities.quasar.server_action",
-                                        "state": {
-                                            "instance": "phrase_action",
-                                            "value": "пустышка",
-                                        },
-                                    }
-                                ],
-                            }
-                        ],
-                    },
-                }
-            ],
-        }
+        name = encode_slot(device_id, slot)
+        payload = scenario_payload(name, device_id, "phrase_action", "пустышка")
         r = await self.session.post(f"{URL_USER}/scenarios", json=payload)
         resp = await r.json()
-        if resp["status"] != "ok":
-            print()
         assert resp["status"] == "ok", resp
         return {"id": resp["scenario_id"]}
 
@@ -341,41 +551,61 @@ class YandexQuasar(Dispatcher):
         _LOGGER.debug(f"{device['name']} => cloud | {text}")
 
         action = "phrase_action" if is_tts else "text_action"
-        name = encode(device["id"])
-        payload = {
-            "name": name[:25],
-            "icon": "home",
-            "triggers": [{"type": "scenario.trigger.voice", "value": name[3:]}],
-            "steps": [
-                {
-                    "type": "scenarios.steps.actions",
-                    "parameters": {
-                        "requested_speaker_capabilities": [],
-                        "launch_devices": [
-                            {
-                                "id": device["id"],
-                                "capabilities": [
-                                    {
-                                        "type": "devices.capabilities.quasar.server_action",
-                                        "state": {"instance": action, "value": text},
-                                    }
-                                ],
-                            }
-                        ],
-                    },
-                }
-            ],
-        }
+        device_id = device["id"]
+        sids = tuple(device.get("scenario_ids") or [device["scenario_id"]])
+
+        # pool is rebuilt when scenarios are changed, like after speakers reload
+        slots = self.scenario_slots.get(device_id)
+        if slots is None or slots[0] != sids:
+            pool = asyncio.Queue()
+            for slot, sid in enumerate(sids):
+                pool.put_nowait((sid, slot))
+            self.scenario_slots[device_id] = (sids, pool)
+        else:
+            pool = slots[1]
 
-        sid = device["scenario_id"]
+        # scenarios are updated in parallel, but launched in the call order
+        prev = self.send_order.get(device_id)
+        done = self.send_order[device_id] = asyncio.get_running_loop().create_future()
 
-        r = await self.session.put(f"{URL_USER}/scenarios/{sid}", json=payload)
-        resp = await r.json()
-        assert resp["status"] == "ok", resp
+        try:
+            sid, slot = await pool.get()
+            try:
+                name = encode_slot(device_id, slot)
+                payload = scenario_payload(name, device_id, action, text)
+
+                # skip scenario update if it has the same step
+                if self.scenario_cache.get(sid) != payload:
+                    self.scenario_cache.pop(sid, None)
+                    r = await self.session.put(
+                        f"{URL_USER}/scenarios/{sid}",
+                        json=payload,
+                        priority=PRIORITY_HIGH,
+                    )
+                    resp = await r.json()
+                    assert resp["status"] == "ok", resp
+                    self.scenario_cache[sid] = payload
+
+                if prev:
+                    await prev
+
+                r = await self.session.post(
+                    f"{URL_USER}/scenarios/{sid}/actions", priority=PRIORITY_HIGH
+                )
+                resp = await r.json()
+                if resp["status"] != "ok":
+                    # scenario may be changed outside
+                    self.scenario_cache.pop(sid, None)
+                assert resp["status"] == "ok", resp
 
-        r = await self.session.post(f"{URL_USER}/scenarios/{sid}/actions")
-        resp = await r.json()
-        assert resp["status"] == "ok", resp
+            finally:
+                pool.put_nowait((sid, slot))
+
+        finally:
+            # also resolved if cancelled while waiting for free scenario
+            done.set_result(None)
+            if self.send_order.get(device_id) is done:
+                del self.send_order[device_id]
 
     async def load_local_speakers(self):
         """Загружает список локальных колонок. Не используется."""
@@ -429,15 +659,9 @@ class YandexQuasar(Dispatcher):
             "type": IOT_TYPES[instance],
             "state": {"instance": instance, "value": value},
         }
-        r = await self.session.post(
-            f"{URL_USER}/devices/{deviceid}/actions", json={"actions": [action]}
-        )
-        resp = await r.json()
-        assert resp["status"] == "ok", resp
+        await self.send_actions(deviceid, [action])
 
     async def device_actions(self, deviceid: str, **kwargs):
-        _LOGGER.debug(f"Device action: {kwargs}")
-
         actions = []
         for k, v in kwargs.items():
             type_ = (
@@ -450,39 +674,130 @@ class YandexQuasar(Dispatcher):
             )
             actions.append({"type": type_, "state": state})
 
+        await self.send_actions(deviceid, actions)
+
+    async def send_actions(self, deviceid: str, actions: list[dict]):
+        """Collect actions for a short window, so a scene with many entities
+        sends one request per device instead of one request per entity.
+        """
+        if self.action_window <= 0:
+            await self._post_actions(deviceid, actions)
+            return
+
+        loop = asyncio.get_running_loop()
+        # one future for each batch with actions of this call
+        futs = []
+        fut = None
+
+        pending = self.pending_actions.setdefault(deviceid, {})
+        for action in actions:
+            key = (action["type"], action["state"]["instance"])
+            prev = pending.get(key)
+            if prev and action["state"].get("relative"):
+                if prev["state"].get("relative"):
+                    # sum relative changes, like volume up twice
+                    value = prev["state"]["value"] + action["state"]["value"]
+                    action = {
+                        "type": action["type"],
+                        "state": {**action["state"], "value": value},
+                    }
+                else:
+                    # relative step after absolute value, like volume=5 and
+                    # volume+1, so absolute value should be sent first
+                    self._flush_device(deviceid)
+                    pending = self.pending_actions.setdefault(deviceid, {})
+                    fut = None
+            # last absolute value wins, like on=False => on=True
+            pending[key] = action
+
+            if fut is None:
+                fut = loop.create_future()
+                self.pending_waiters.setdefault(deviceid, []).append(fut)
+                futs.append(fut)
+
+        if not self.actions_timer:
+            self.actions_timer = loop.call_later(
+                self.action_window, self._flush_actions
+            )
+
+        await asyncio.gather(*futs)
+
+    def _flush_actions(self):
+        self.actions_timer = None
+
+        # different devices are sent in parallel
+        for deviceid in list(self.pending_actions):
+            self._flush_device(deviceid)
+
+    def _flush_device(self, deviceid: str):
+        actions = self.pending_actions.pop(deviceid)
+        waiters = self.pending_waiters.pop(deviceid, [])
+        prev = self.last_flush.get(deviceid)
+        coro = self._post_pending(deviceid, list(actions.values()), waiters, prev)
+        task = self.last_flush[deviceid] = asyncio.create_task(coro)
+        self.action_tasks.add(task)
+        task.add_done_callback(self.action_tasks.discard)
+        task.add_done_callback(lambda t: self._flush_done(deviceid, t))
+
+    def _flush_done(self, deviceid: str, task: asyncio.Task):
+        if self.last_flush.get(deviceid) is task:
+            del self.last_flush[deviceid]
+
+    async def _post_pending(
+        self, deviceid: str, actions: list, waiters: list, prev: asyncio.Task
+    ):
+        try:
+            if prev:
+                # previous batch of same device should be applied first
+                await asyncio.wait([prev])
+            await self._post_actions(deviceid, actions)
+            for fut in waiters:
+                if not fut.done():
+                    fut.set_result(None)
+        except Exception as e:
+            for fut in waiters:
+                if not fut.done():
+                    fut.set_exception(e)
+
+    async def _post_actions(self, deviceid: str, actions: list):
+        _LOGGER.debug(f"Device action: {actions}")
+
         r = await self.session.post(
-            f"{URL_USER}/devices/{deviceid}/actions", json={"actions": actions}
+            f"{URL_USER}/devices/{deviceid}/actions",
+            json={"actions": actions},
+            priority=PRIORITY_HIGH,
         )
         resp = await r.json()
         assert resp["status"] == "ok", resp
 
     async def update_online_stats(self):
-        if not self.online_updated.is_set():
-            await self.online_updated.wait()
+        ttl = self.online_ttl_stream if self.stream_ts else self.online_ttl
+        if time.time() - self.online_ts < ttl:
             return
 
-        self.online_updated.clear()
-
-        # _LOGGER.debug(f"Update speakers online status")
+        # all speakers share one request
+        if not self.online_task:
+            self.online_task = asyncio.create_task(self._update_online_stats())
+        await asyncio.shield(self.online_task)
 
+    async def _update_online_stats(self):
         try:
-            r = await self.session.get("https://quasar.yandex.ru/devices_online_stats")
+            r = await self.session.get(
+                "https://quasar.yandex.ru/devices_online_stats", priority=PRIORITY_LOW
+            )
             resp = await r.json()
             assert resp["status"] == "ok", resp
-        except:
+        except Exception as e:
+            _LOGGER.debug("Can't update online stats", exc_info=e)
             return
         finally:
-            self.online_updated.set()
+            self.online_task = None
 
         for speaker in resp["items"]:
-            for device in self.devices:
-                if (
-                    "quasar_info" not in device
-                    or device["quasar_info"]["device_id"] != speaker["id"]
-                ):
-                    continue
+            if device := self.index.quasar.get(speaker["id"]):
                 device["online"] = speaker["online"]
-                break
+
+        self.online_ts = time.time()
 
     async def connect(self):
         r = await self.session.get("https://iot.quasar.yandex.ru/m/v3/user/devices")
@@ -493,20 +808,30 @@ class YandexQuasar(Dispatcher):
             if "sharing_info" in house:
                 continue
             for device in house["all"]:
-                self.dispatch_update(device["id"], device)
+                # only devices changed while stream was offline
+                self.index.update(device)
+                self.update_online(device)
+                self.dispatch_changes(device)
 
         ws = await self.session.ws_connect(resp["updates_url"], heartbeat=60)
+        self.stream_ts = self.message_ts = time.time()
         async for msg in ws:
             if msg.type != WSMsgType.TEXT:
                 break
+            self.message_ts = time.time()
             resp = msg.json()
             # "ping", "update_scenario_list"
             operation = resp.get("operation")
             if operation == "update_states":
                 try:
                     resp = json.loads(resp["message"])
+                    lag = self.update_lag(resp["updated_devices"])
+                    if lag is not None:
+                        self.message_lag = lag
                     for device in resp["updated_devices"]:
-                        self.dispatch_update(device["id"], device)
+                        self.index.update(device)
+                        self.update_online(device)
+                        self.dispatch_changes(device)
                 except Exception as e:
                     _LOGGER.debug(f"Parse quasar update error: {msg.data}", exc_info=e)
 
@@ -514,6 +839,66 @@ class YandexQuasar(Dispatcher):
                 if '"source":"create_scenario_launch"' in resp["message"]:
                     asyncio.create_task(self.get_voice_trigger(1))
 
+    def update_lag(self, devices: list) -> Optional[float]:
+        """Lag of update message from the newest last_updated of its items."""
+        ts = max(
+            (
+                item["last_updated"]
+                for device in devices
+                for kind in ("capabilities", "properties")
+                for item in device.get(kind, [])
+                if item.get("last_updated")
+            ),
+            default=None,
+        )
+        return round(self.message_ts - ts, 3) if ts else None
+
+    def diff_device(self, device: dict) -> Optional[dict]:
+        """Returns device with only changed capabilities and properties or None
+        if nothing changed.
+        """
+        last = self.last_values.setdefault(device["id"], {})
+
+        changed = device.get("state") != last.get("state")
+        last["state"] = device.get("state")
+
+        result = {
+            k: v for k, v in device.items() if k not in ("capabilities", "properties")
+        }
+
+        for kind in ("capabilities", "properties"):
+            if kind not in device:
+                continue
+
+            items = []
+            for item in device[kind]:
+                instance = item.get("parameters", {}).get("instance", "on")
+                key = (item["type"], instance)
+                value = item["state"]["value"] if item.get("state") else None
+                if item["type"] in EVENT_TYPES or key not in last or last[key] != value:
+                    last[key] = value
+                    items.append(item)
+
+            result[kind] = items
+            changed |= len(items) > 0
+
+        return result if changed else None
+
+    def dispatch_changes(self, device: dict):
+        if device := self.diff_device(device):
+            self.updates_stats["delivered"] += 1
+            self.dispatch_update(device["id"], device)
+        else:
+            self.updates_stats["suppressed"] += 1
+
+    def update_online(self, data: dict):
+        """Speakers online state from the updates stream."""
+        if "state" not in data:
+            return
+        device = self.index.get_device(data["id"])
+        if device and "quasar_info" in device:
+            device["online"] = data["state"] == "online"
+
     async def get_voice_trigger(self, retries: int = 0):
         try:
             # 1. Get all scenarios history
@@ -557,12 +942,22 @@ class YandexQuasar(Dispatcher):
             _LOGGER.debug("Can't get voice scenario", exc_info=e)
 
     async def run_forever(self):
+        delay = self.reconnect_min
         while not self.session.session.closed:
             try:
                 await self.connect()
             except Exception as e:
                 _LOGGER.debug("Quasar update error", exc_info=e)
-            await asyncio.sleep(30)
+
+            # reset backoff after healthy connection
+            if self.stream_ts and time.time() - self.stream_ts > self.reconnect_max:
+                delay = self.reconnect_min
+
+            self.stream_ts = 0
+            self.reconnects += 1
+
+            await asyncio.sleep(random.uniform(delay / 2, delay))
+            delay = min(delay * 2, self.reconnect_max)
 
     def start(self):
         self.updates_task = asyncio.create_task(self.run_forever())
@@ -570,6 +965,9 @@ class YandexQuasar(Dispatcher):
     def stop(self):
         if self.updates_task:
             self.updates_task.cancel()
+        if self.actions_timer:
+            self.actions_timer.cancel()
+            self._flush_actions()
         self.dispatcher.clear()
 
     async def set_account_config(self, key: str, value):
@@ -17,16 +17,33 @@ Errors:
 """
 import asyncio
 import base64
+import heapq
+import itertools
 import json
 import logging
 import pickle
 import re
 import time
+from urllib.parse import urlsplit
 
 from aiohttp import ClientSession
 
 _LOGGER = logging.getLogger(__name__)
 
+# lower value - higher priority
+PRIORITY_HIGH = 0  # interactive: device actions, TTS, commands
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2  # background: online stats, config reads
+
+# DDoS protection for Yandex servers: host => (requests per second, burst)
+RATE_LIMITS = {
+    "iot.quasar.yandex.ru": (5, 3),
+    "quasar.yandex.ru": (5, 2),
+    "quasar.yandex.net": (5, 2),
+    "api.music.yandex.net": (10, 5),
+}
+RATE_LIMIT_DEFAULT = (5, 1)
+
 
 class LoginResponse:
     """ "
@@ -89,6 +106,100 @@ class LoginResponse:
         return "captcha.required" in self.errors
 
 
+class TokenBucket:
+    """Token bucket with priority queue for one Yandex host."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.ts = time.monotonic()
+
+        self.waiters: list[tuple[int, int, asyncio.Future]] = []
+        self.counter = itertools.count()
+        self.timer: asyncio.TimerHandle | None = None
+
+        self.requests = 0
+        self.max_queue = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _refill(self):
+        ts = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (ts - self.ts) * self.rate)
+        self.ts = ts
+
+    def _schedule(self):
+        if self.timer or not self.waiters:
+            return
+        delay = max(0.0, (1 - self.tokens) / self.rate)
+        self.timer = asyncio.get_running_loop().call_later(delay, self._wakeup)
+
+    def _wakeup(self):
+        self.timer = None
+        self._refill()
+        while self.waiters and self.tokens >= 1:
+            _, _, fut = heapq.heappop(self.waiters)
+            # skip cancelled requests
+            if fut.done():
+                continue
+            self.tokens -= 1
+            fut.set_result(None)
+        self._schedule()
+
+    async def acquire(self, priority: int = PRIORITY_NORMAL):
+        ts = time.monotonic()
+
+        self._refill()
+        if not self.waiters and self.tokens >= 1:
+            self.tokens -= 1
+        else:
+            fut = asyncio.get_running_loop().create_future()
+            heapq.heappush(self.waiters, (priority, next(self.counter), fut))
+            self.max_queue = max(self.max_queue, len(self.waiters))
+            self._schedule()
+            await fut
+
+        wait = time.monotonic() - ts
+        self.requests += 1
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "queue": sum(not i[2].done() for i in self.waiters),
+            "max_queue": self.max_queue,
+            "requests": self.requests,
+            "wait_avg": self.wait_total / self.requests if self.requests else 0,
+            "wait_max": self.wait_max,
+        }
+
+
+class RequestScheduler:
+    """Per-host rate limiter, so slow background polls on one Yandex host
+    don't block interactive requests to another one.
+    """
+
+    def __init__(self):
+        self.buckets: dict[str, TokenBucket] = {}
+
+    def bucket(self, url: str) -> TokenBucket:
+        host = urlsplit(url).hostname or ""
+        if host not in RATE_LIMITS:
+            host = "default"
+        if host not in self.buckets:
+            self.buckets[host] = TokenBucket(*RATE_LIMITS.get(host, RATE_LIMIT_DEFAULT))
+        return self.buckets[host]
+
+    async def acquire(self, url: str, priority: int = PRIORITY_NORMAL):
+        await self.bucket(url).acquire(priority)
+
+    @property
+    def stats(self) -> dict:
+        return {k: v.stats for k, v in self.buckets.items()}
+
+
 # noinspection PyPep8
 class YandexSession:
     """Class for login in yandex via username, token, capcha."""
@@ -98,8 +209,6 @@ class YandexSession:
     proxy: str = None
     ssl: bool = False
 
-    last_ts: float = 0
-
     def __init__(
         self,
         session: ClientSession,
@@ -113,6 +222,7 @@ class YandexSession:
         :param cookie: optional base64 cookie from last session
         """
         self.session = session
+        self.scheduler = RequestScheduler()
 
         self.x_token = x_token
         self.music_token = music_token
@@ -477,11 +587,16 @@ class YandexSession:
         kwargs.setdefault("ssl", self.ssl)
         return await self.session.ws_connect(*args, **kwargs)
 
-    async def _request(self, method: str, url: str, retry: int = 2, **kwargs):
+    async def _request(
+        self,
+        method: str,
+        url: str,
+        retry: int = 2,
+        priority: int = PRIORITY_NORMAL,
+        **kwargs,
+    ):
         # DDoS protection for Yandex servers
-        while (delay := self.last_ts + 0.2 - time.time()) > 0:
-            await asyncio.sleep(delay)
-        self.last_ts = time.time()
+        await self.scheduler.acquire(url, priority)
 
         # all except GET should contain CSRF token
         if method != "get":
@@ -513,11 +628,14 @@ class YandexSession:
 
         if retry:
             _LOGGER.debug(f"Retry {method} {url}")
-            return await self._request(method, url, retry - 1, **kwargs)
+            return await self._request(method, url, retry - 1, priority, **kwargs)
 
         raise Exception(f"{url} return {r.status} status")
 
     async def _request_glagol(self, url: str, retry: int = 2, **kwargs):
+        priority = kwargs.pop("priority", PRIORITY_NORMAL)
+        await self.scheduler.acquire(url, priority)
+
         # update music token if needed
         if not self.music_token:
             assert self.x_token, "x-token required"
@@ -535,7 +653,7 @@ class YandexSession:
 
         if retry:
             _LOGGER.debug(f"Retry {url}")
-            return await self._request_glagol(url, retry - 1)
+            return await self._request_glagol(url, retry - 1, priority=priority)
 
         raise Exception(f"{url} return {r.status} status")
 
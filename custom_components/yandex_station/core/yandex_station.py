@@ -27,9 +27,10 @@ from homeassistant.helpers.template import Template
 from homeassistant.util import dt
 
 from . import utils
-from .const import DATA_CONFIG, DOMAIN
+from .const import DATA_CONFIG, DATA_TTS_CACHE, DOMAIN
+from .tts_cache import TTSCache
 from .yandex_glagol import YandexGlagol
-from .yandex_music import get_mp3
+from .yandex_music import URL_TTL, get_mp3, prefetch_mp3
 from .yandex_quasar import YandexQuasar
 
 _LOGGER = logging.getLogger(__name__)
@@ -178,6 +179,9 @@ class YandexStationBase(MediaBrowser):
     _attr_extra_state_attributes: dict = None
 
     local_state: Optional[dict] = None
+    # последний appState и распарсенные из него item и stream
+    app_state: Optional[str] = None
+    app_extra: tuple = (None, None)
     # для управления громкостью Алисы
     alice_volume: Optional[dict] = None
 
@@ -230,6 +234,12 @@ class YandexStationBase(MediaBrowser):
         if not self.hass:
             return
 
+        # online state from the updates stream, only for cloud mode
+        if self._attr_should_poll and "online" in self.device:
+            if self._attr_available != self.device["online"]:
+                self._attr_available = self.device["online"]
+                self.async_write_ha_state()
+
         if "scenario_name" in device:
             for item in device["capabilities"]:
                 event_data = item["state"]
@@ -555,6 +565,9 @@ class YandexStationBase(MediaBrowser):
         if self.local_state == state:
             return
 
+        if self._update_progress(state):
+            return
+
         if "softwareVersion" in data:
             self.update_device_info(data["softwareVersion"])
 
@@ -567,19 +580,7 @@ class YandexStationBase(MediaBrowser):
         if self.alice_volume:
             self._process_alice_volume(state["aliceState"])
 
-        extra_item = extra_stream = None
-
-        try:
-            astate = data["extra"]["appState"].encode("ascii")
-            astate = base64.b64decode(astate)
-            for m in RE_EXTRA.findall(astate):
-                m = json.loads(m)
-                if "item" in m:
-                    extra_item = m["item"]
-                if "stream" in m:
-                    extra_stream = m["stream"]
-        except:
-            pass
+        extra_item, extra_stream = self._parse_app_state(data)
 
         mctp = miur = mpos = mart = mdur = mtit = None
         stat = MediaPlayerState.IDLE
@@ -653,6 +654,72 @@ class YandexStationBase(MediaBrowser):
         if self.hass:
             self.async_write_ha_state()
 
+    def _update_progress(self, state: dict) -> bool:
+        """Silently update position if only playback progress changed. HA
+        calculates position itself, so no need to write state every second.
+        Returns False if something else changed or if it was a seek.
+        """
+        prev: dict = self.local_state
+        if not prev or not prev.get("playerState") or not state.get("playerState"):
+            return False
+
+        pstate = state["playerState"]
+        progress = pstate["progress"]
+        if prev["playerState"]["progress"] == progress:
+            return False
+
+        # compare everything except progress
+        if {**prev["playerState"], "progress": progress} != pstate:
+            return False
+        if {**prev, "playerState": pstate} != state:
+            return False
+
+        now = dt.utcnow()
+
+        position = self._attr_media_position or 0
+        if state["playing"] and self._attr_media_position_updated_at:
+            position += (now - self._attr_media_position_updated_at).total_seconds()
+
+        # seek, need to write state
+        if abs(progress - position) > 2:
+            return False
+
+        self.local_state = state
+        self._attr_media_position = progress
+        self._attr_media_position_updated_at = now
+        return True
+
+    def _parse_app_state(self, data: dict) -> tuple:
+        try:
+            app_state = data["extra"]["appState"]
+        except (KeyError, TypeError):
+            return None, None
+
+        # appState is big and usually the same for all ticks
+        if app_state == self.app_state:
+            return self.app_extra
+
+        extra_item = extra_stream = None
+
+        try:
+            astate = base64.b64decode(app_state.encode("ascii"))
+            for m in RE_EXTRA.findall(astate):
+                # parse only fields we use
+                if b'"item"' not in m and b'"stream"' not in m:
+                    continue
+                m = json.loads(m)
+                if "item" in m:
+                    extra_item = m["item"]
+                if "stream" in m:
+                    extra_stream = m["stream"]
+        except:
+            pass
+
+        self.app_state = app_state
+        self.app_extra = (extra_item, extra_stream)
+
+        return self.app_extra
+
     # BASE MEDIA PLAYER FUNCTIONS
 
     async def async_added_to_hass(self):
@@ -770,8 +837,13 @@ class YandexStationBase(MediaBrowser):
     ):
         # backward support Hass lower than v2022.3
         if "/api/tts_proxy/" in media_id:
-            session = async_get_clientsession(self.hass)
-            media_id = await utils.get_tts_message(session, media_id)
+            # read message from local TTS cache file without HTTP request
+            tts_cache: TTSCache = self.hass.data[DOMAIN][DATA_TTS_CACHE]
+            message = await tts_cache.async_get_message(self.hass, media_id)
+            if not message:
+                session = async_get_clientsession(self.hass)
+                message = await utils.get_tts_message(session, media_id)
+            media_id = message
             media_type = "tts"
 
         if media_id.startswith("media-source://tts/"):
@@ -899,6 +971,7 @@ class YandexStation(YandexStationBase):
     sync_enabled: bool = False
 
     sync_id: Optional[str] = None
+    sync_next_id: Optional[str] = None
     sync_playing: Optional[bool] = None
     sync_volume: Optional[float] = None
     sync_mute: Optional[bool] = None
@@ -965,6 +1038,18 @@ class YandexStation(YandexStationBase):
             # запускаем новую песню, если ID изменился
             self.hass.create_task(self.sync_play_media(player_state))
 
+        # заранее получаем ссылку на следующую песню из очереди
+        try:
+            next_id = player_state["entityInfo"]["next"]["id"]
+            if (
+                next_id != self.sync_next_id
+                and player_state["duration"] - player_state["progress"] < URL_TTL
+            ):
+                self.sync_next_id = next_id
+                self.hass.create_task(prefetch_mp3(self.quasar.session, next_id))
+        except (KeyError, TypeError):
+            pass
+
         if state["volume"] and self.sync_volume != state["volume"]:
             self.sync_volume = state["volume"]
             self.sync_mute = None
@@ -8,7 +8,11 @@ from .core.yandex_quasar import YandexQuasar
 
 async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry):
     quasar: YandexQuasar = hass.data[DOMAIN][entry.unique_id]
-    return {"devices": quasar.devices}
+    return {
+        "devices": quasar.devices,
+        "scheduler": quasar.session.scheduler.stats,
+        "updates": quasar.updates_stats,
+    }
 
 
 async def async_get_device_diagnostics(
@@ -17,9 +21,4 @@ async def async_get_device_diagnostics(
     did = next(did for _, did in device.identifiers)
 
     quasar: YandexQuasar = hass.data[DOMAIN][entry.unique_id]
-    device = next(
-        device
-        for device in quasar.devices
-        if device["id"] == did or device.get("quasar_info", {}).get("device_id") == did
-    )
-    return {"device": device}
+    return {"device": quasar.index.get_device(did)}
@@ -1,7 +1,6 @@
 from homeassistant.components.light import ColorMode, LightEntity, LightEntityFeature
 from homeassistant.const import CONF_INCLUDE
 
-from .core import utils
 from .core.const import DATA_CONFIG, DOMAIN
 from .core.entity import YandexEntity
 
@@ -13,8 +12,7 @@ async def async_setup_entry(hass, entry, async_add_entities):
     quasar = hass.data[DOMAIN][entry.unique_id]
     entities = [
         YandexLight(quasar, device)
-        for device in quasar.devices
-        if utils.device_include(device, include, INCLUDE_TYPES)
+        for device, _ in quasar.index.include(include, INCLUDE_TYPES)
     ]
     async_add_entities(entities, True)
 
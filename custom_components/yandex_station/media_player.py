@@ -10,7 +10,6 @@ from homeassistant.components.media_player import (
 )
 from homeassistant.const import CONF_INCLUDE
 
-from .core import utils
 from .core.const import CONF_INTENTS, DATA_CONFIG, DOMAIN
 from .core.entity import YandexEntity
 from .core.yandex_quasar import YandexQuasar
@@ -33,7 +32,7 @@ async def async_setup_entry(hass, entry, async_add_entities):
 
     # add Yandex stations
     entities = []
-    for speaker in await quasar.load_speakers():
+    for speaker in quasar.speakers:
         speaker["entity"] = entity = YandexStation(quasar, speaker)
         entities.append(entity)
     for module in quasar.modules:
@@ -48,8 +47,7 @@ async def async_setup_entry(hass, entry, async_add_entities):
     include = hass.data[DOMAIN][DATA_CONFIG][CONF_INCLUDE]
     entities = [
         YandexMediaPlayer(quasar, device)
-        for device in quasar.devices
-        if utils.device_include(device, include, INCLUDE_TYPES)
+        for device, _ in quasar.index.include(include, INCLUDE_TYPES)
     ]
     async_add_entities(entities, True)
 
@@ -9,7 +9,6 @@ from homeassistant.components.remote import (
 )
 from homeassistant.const import CONF_INCLUDE
 
-from .core import utils
 from .core.const import DATA_CONFIG, DOMAIN
 from .core.yandex_quasar import YandexQuasar
 
@@ -23,8 +22,7 @@ async def async_setup_entry(hass, entry, async_add_entities):
     quasar = hass.data[DOMAIN][entry.unique_id]
     entities = [
         YandexOther(quasar, device)
-        for device in quasar.devices
-        if utils.device_include(device, include, INCLUDE_TYPES)
+        for device, _ in quasar.index.include(include, INCLUDE_TYPES)
     ]
     async_add_entities(entities, True)
 
@@ -65,11 +65,8 @@ async def async_setup_entry(hass, entry, async_add_entities):
     include = hass.data[DOMAIN][DATA_CONFIG][CONF_INCLUDE]
     entities = []
 
-    for device in quasar.devices:
-        # compare device name/id/room/etc
-        if not (config := utils.device_include(device, include)):
-            continue
-
+    # compare device name/id/room/etc
+    for device, config in quasar.index.include(include):
         if not (instances := config.get("capabilities")):
             continue
 
@@ -1,4 +1,5 @@
 import logging
+import time
 
 from homeassistant.components.sensor import (
     SensorDeviceClass,
@@ -16,11 +17,14 @@ from homeassistant.const import (
     UnitOfPressure,
     UnitOfTemperature,
     CONCENTRATION_MICROGRAMS_PER_CUBIC_METER,
+    EntityCategory,
+    UnitOfTime,
 )
 
 from .core import utils
 from .core.const import DATA_CONFIG, DOMAIN
 from .core.entity import YandexCustomEntity
+from .core.yandex_quasar import YandexQuasar
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -117,16 +121,20 @@ INCLUDE_INSTANCES: list[str] = [desc.key for desc in SENSOR_TYPES]
 
 async def async_setup_entry(hass, entry, async_add_entities):
     """Set up sensor from a config entry."""
-    include = hass.data[DOMAIN][DATA_CONFIG][CONF_INCLUDE]
     quasar = hass.data[DOMAIN][entry.unique_id]
 
-    entities = []
+    async_add_entities([YandexStreamSensor(quasar, entry.unique_id)], True)
 
-    for device in quasar.devices:
-        # compare device name/id/room/etc
-        if not (config := utils.device_include(device, include)):
-            continue
+    config = hass.data[DOMAIN][DATA_CONFIG]
+    if CONF_INCLUDE not in config:
+        return
 
+    include = config[CONF_INCLUDE]
+
+    entities = []
+
+    # compare device name/id/room/etc
+    for device, config in quasar.index.include(include):
         if "properties" in config:
             instances = config["properties"]
         elif device["type"] in INCLUDE_TYPES:
@@ -151,3 +159,31 @@ class YandexCustomSensor(SensorEntity, YandexCustomEntity):
     def internal_update(self, capabilities: dict, properties: dict):
         if self.instance in properties:
             self._attr_native_value = properties[self.instance]
+
+
+class YandexStreamSensor(SensorEntity):
+    """Updates stream health. State - lag of the last update message."""
+
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_icon = "mdi:cloud-sync"
+    _attr_native_unit_of_measurement = UnitOfTime.SECONDS
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(self, quasar: YandexQuasar, login: str):
+        self.quasar = quasar
+        self._attr_name = f"Yandex {login} stream"
+        self._attr_unique_id = f"{login}_stream"
+
+    async def async_update(self):
+        self._attr_available = self.quasar.stream_ts > 0
+        if not self._attr_available:
+            return
+
+        ts = time.time()
+        self._attr_native_value = self.quasar.message_lag
+        self._attr_extra_state_attributes = {
+            "last_message": round(ts - self.quasar.message_ts),
+            "uptime": round(ts - self.quasar.stream_ts),
+            "reconnects": self.quasar.reconnects,
+        }
@@ -20,11 +20,8 @@ async def async_setup_entry(hass, entry, async_add_entities):
 
     entities = []
 
-    for device in quasar.devices:
-        # compare device name/id/room/etc
-        if not (config := utils.device_include(device, include)):
-            continue
-
+    # compare device name/id/room/etc
+    for device, config in quasar.index.include(include):
         # compare device type
         if device["type"] in INCLUDE_TYPES:
             entities.append(YandexSwitch(quasar, device))
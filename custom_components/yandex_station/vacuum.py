@@ -7,7 +7,6 @@ from homeassistant.components.vacuum import (
 )
 from homeassistant.const import CONF_INCLUDE, STATE_IDLE, STATE_PAUSED
 
-from .core import utils
 from .core.const import DATA_CONFIG, DOMAIN
 from .core.entity import YandexEntity
 
@@ -21,8 +20,7 @@ async def async_setup_entry(hass, entry, async_add_entities):
     quasar = hass.data[DOMAIN][entry.unique_id]
     entities = [
         YandexVacuum(quasar, device)
-        for device in quasar.devices
-        if utils.device_include(device, include, INCLUDE_TYPES)
+        for device, _ in quasar.index.include(include, INCLUDE_TYPES)
     ]
     async_add_entities(entities)
 
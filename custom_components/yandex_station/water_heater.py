@@ -6,7 +6,6 @@ from homeassistant.components.water_heater import (
 )
 from homeassistant.const import CONF_INCLUDE, UnitOfTemperature
 
-from .core import utils
 from .core.const import DATA_CONFIG, DOMAIN
 from .core.entity import YandexEntity
 
@@ -20,8 +19,7 @@ async def async_setup_entry(hass, entry, async_add_entities):
     quasar = hass.data[DOMAIN][entry.unique_id]
     entities = [
         YandexKettle(quasar, device)
-        for device in quasar.devices
-        if utils.device_include(device, include, INCLUDE_TYPES)
+        for device, _ in quasar.index.include(include, INCLUDE_TYPES)
     ]
     async_add_entities(entities, True)
 
@@ -0,0 +1,70 @@
+"""Benchmark RGB565 encoder on common plate resolutions.
+
+Run from Home Assistant config folder, in Home Assistant Python environment:
+
+    python -m scripts.benchmark_rgb565
+
+Output of the encoder without dithering is checked against the original per
+pixel encoder, which is also timed for comparison.
+"""
+
+import os
+import struct
+import time
+
+from PIL import Image
+
+from custom_components.openhasp.image import rgb565_bytes
+
+RESOLUTIONS = ((320, 240), (480, 320), (480, 480))
+REPEAT = 10
+
+
+def rgb565_reference(img):
+    """Original per pixel encoder, kept only for comparison."""
+    out = bytearray()
+    for pix in img.getdata():
+        r = (pix[0] >> 3) & 0x1F
+        g = (pix[1] >> 2) & 0x3F
+        b = (pix[2] >> 3) & 0x1F
+        out += struct.pack("H", (r << 11) | (g << 5) | b)
+    return bytes(out)
+
+
+def sample_image(size):
+    """Random noise with gradient, so all channel values are covered."""
+    width, height = size
+    noise = Image.frombytes("RGB", size, os.urandom(width * height * 3))
+    gradient = Image.linear_gradient("L").resize(size).convert("RGB")
+    return Image.blend(noise, gradient, 0.5)
+
+
+def timeit(func, *args, repeat=REPEAT):
+    """Best run time in milliseconds."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    """Print encoder timings and check output against reference encoder."""
+    print(f"{'size':>9} {'reference':>10} {'encoder':>10} {'dither':>10}  equal")
+    for size in RESOLUTIONS:
+        img = sample_image(size)
+        equal = rgb565_bytes(img) == rgb565_reference(img)
+        reference = timeit(rgb565_reference, img, repeat=1)
+        plain = timeit(rgb565_bytes, img)
+        dither = timeit(rgb565_bytes, img, True)
+        print(
+            f"{size[0]:>4}x{size[1]:<4} {reference:>8.1f}ms {plain:>8.1f}ms "
+            f"{dither:>8.1f}ms  {equal}"
+        )
+        assert equal, f"RGB565 output differs from reference for {size}"
+
+
+if __name__ == "__main__":
+    main()